@@ -51,106 +51,339 @@ def _blunt_tangent_ogive(rho, R_base=None, L_ogive=None, rn=None, **kwargs):
 	return xt, yt, x0, xa
 
 
-def tangent_ogive(R_DICT, L_DICT, rho=None, res=1000, **kwargs):
-	"""Calculate the shape of a tangent ogive with nose
+class Segment:
+	"""One piece of the axisymmetric projectile profile
+	
+		Segments are assembled in order by :func:`assemble`. Each segment 
+		reports the number of points it contributes through :meth:`count` 
+		before anything is computed, so a whole profile (or a batch of 
+		profiles) is written into a single preallocated buffer. A segment 
+		starts from the last point written by the segment before it and 
+		keeps no state between calls, so one segment object can be reused 
+		across any number of bullet designs.
+	"""
+	def count(self, res):
+		"""Return the number of points this segment writes
+		
+			:param res: Parametric resolution.
+			:type res: int
+		"""
+		raise NotImplementedError
+
+	def fill(self, buf, start, res):
+		"""Write the segment points into ``buf[:, start:start+count]``
+		
+			:param buf: The 2 x n output buffer. The x-coordinates are in 
+				buf[0] and the y-coordinates are in buf[1].
+			:type buf: np.array
+			:param start: The column of ``buf`` to start writing at. The 
+				previous point of the profile is ``buf[:, start-1]``.
+			:type start: int
+			:param res: Parametric resolution.
+			:type res: int
+		"""
+		raise NotImplementedError
+
+
+class NoseCap(Segment):
+	"""Spherical nose cap of a blunted tangent ogive
 	
 		:param R_base: Radius of the base, mm
 		:type R_base: float, int
 		:param L_ogive: length of the ogive, mm
 		:type L_ogive: float, int
-		:param res: Parametric resolution. Default is 1000.
-		:type res: int
-		:return xy: The n x 2 numpy array containing the x-coordinates in 
-			xy[0] and the y-coordinates in xy[1]
-		:rtype xy: np.array()
-		:return x0: x-coord of center of circle which defines the shape 
-			of the nose, mm
-		:rtype x0: int, float
-		:return rn: nose radius, mm
-		:rtype rn: int, float
+		:param rn: radius of the nose sphere, mm
+		:type rn: float, int
+		:param rho: ogive radius, mm. Calculated from ``R_base`` and 
+			``L_ogive`` if None.
+		:type rho: None, float, int
+	"""
+	def __init__(self, R_base, L_ogive, rn, rho=None):
+		if rho is None:
+			rho = (R_base**2 + L_ogive**2)/(2*R_base)
+		self.rn = rn
+		self.xt, self.yt, self.x0, self.xa = _blunt_tangent_ogive(
+			rho=rho, R_base=R_base, L_ogive=L_ogive, rn=rn)
+
+	def count(self, res):
+		return res + 1
+
+	def fill(self, buf, start, res):
+		theta_t = np.arctan(self.yt/(self.x0 - self.xt))  # radians
+		theta = np.linspace(0, theta_t, res)  # radians
+		stop = start + res
+		np.cos(theta, out=buf[0, start:stop])
+		buf[0, start:stop] *= -self.rn
+		buf[0, start:stop] += self.x0
+		np.sin(theta, out=buf[1, start:stop])
+		buf[1, start:stop] *= self.rn
+		# The arc finishes exactly on the point of tangency
+		buf[0, stop] = self.xt
+		buf[1, stop] = self.yt
+		return None
+
+
+class Ogive(Segment):
+	"""Tangent ogive from the point of tangency with the nose cap
+	
+		The ogive is sampled at ``L_ogive/res`` intervals from the origin, 
+		keeping only the samples aft of the nose cap.
+	
+		:param R_base: Radius of the base, mm
+		:type R_base: float, int
+		:param L_ogive: length of the ogive, mm
+		:type L_ogive: float, int
+		:param rn: radius of the nose sphere, mm
+		:type rn: float, int
+		:param rho: ogive radius, mm. Calculated from ``R_base`` and 
+			``L_ogive`` if None.
+		:type rho: None, float, int
+	"""
+	def __init__(self, R_base, L_ogive, rn, rho=None):
+		if rho is None:
+			rho = (R_base**2 + L_ogive**2)/(2*R_base)
+		self.R_base = R_base
+		self.L_ogive = L_ogive
+		self.rho = rho
+		self.xt, self.yt, _, _ = _blunt_tangent_ogive(
+			rho=rho, R_base=R_base, L_ogive=L_ogive, rn=rn)
+
+	def _index_range(self, res):
+		step = self.L_ogive/res
+		n_total = int(np.ceil(self.L_ogive/step))
+		i0 = min(int(np.ceil(self.xt/step)), n_total)
+		return i0, n_total, step
+
+	def count(self, res):
+		i0, n_total, _ = self._index_range(res)
+		return n_total - i0
+
+	def fill(self, buf, start, res):
+		i0, n_total, step = self._index_range(res)
+		stop = start + n_total - i0
+		x = buf[0, start:stop]
+		y = buf[1, start:stop]
+		x[:] = np.arange(i0, n_total)
+		x *= step
+		np.subtract(self.L_ogive, x, out=y)
+		np.square(y, out=y)
+		np.subtract(self.rho**2, y, out=y)
+		np.sqrt(y, out=y)
+		y += self.R_base - self.rho
+		return None
+
+
+class Cannelure(Segment):
+	"""Rectangular cannelure groove
+	
+		:param R_cannelure: Radius of the bottom of the cannelure groove 
+			measured from the center axis of the projectile, mm
+		:type R_cannelure: float, int
+		:param L_cannelure: Length of the cannelure, mm
+		:type L_cannelure: float, int
 	"""
-	y_coords = np.array([])
-	x_coords = np.array([])
+	def __init__(self, R_cannelure, L_cannelure):
+		self.R_cannelure = R_cannelure
+		self.L_cannelure = L_cannelure
+
+	def count(self, res):
+		if self.R_cannelure == 0 or self.L_cannelure == 0:
+			return 0
+		return 3
+
+	def fill(self, buf, start, res):
+		if self.count(res) == 0:
+			return None
+		x1 = buf[0, start-1]
+		y3 = buf[1, start-1]
+		x2 = x1 + self.L_cannelure
+		buf[0, start:start+3] = (x1, x2, x2)
+		buf[1, start:start+3] = (self.R_cannelure, self.R_cannelure, y3)
+		return None
+
+
+class BearingSurface(Segment):
+	"""Straight (bearing) portion of the bullet at constant radius
 	
+		:param L_basic: Length of the straight portion, mm
+		:type L_basic: float, int
+	"""
+	def __init__(self, L_basic):
+		self.L_basic = L_basic
+
+	def count(self, res):
+		return 0 if self.L_basic == 0 else 1
+
+	def fill(self, buf, start, res):
+		if self.count(res) == 0:
+			return None
+		buf[0, start] = buf[0, start-1] + self.L_basic
+		buf[1, start] = buf[1, start-1]
+		return None
+
+
+class BoatTail(Segment):
+	"""Tapered boat tail
+	
+		:param L_bt: Length of the boat tail, mm
+		:type L_bt: int, float
+		:param R_bt: Radius at the aft end of the boat tail, mm
+		:type R_bt: None, int, float
+		:param bt_angle: Angle the boat tail makes with the center axis. 
+			Give value in degrees. It will automatically be converted to 
+			radians. Only used when ``R_bt`` is None.
+		:type bt_angle: None, int, float
+		:raises: ValueError if neither R_bt nor bt_angle are given.
+	"""
+	def __init__(self, L_bt, R_bt=None, bt_angle=None):
+		if R_bt is None and bt_angle is None:
+			raise ValueError('R_bt or bt_angle must be numeric values.')
+		self.L_bt = L_bt
+		self.R_bt = R_bt
+		self.bt_angle = bt_angle
+
+	def count(self, res):
+		return 1
+
+	def fill(self, buf, start, res):
+		buf[0, start] = buf[0, start-1] + self.L_bt
+		if self.R_bt is not None:
+			buf[1, start] = self.R_bt
+		else:
+			dy = self.L_bt * np.tan(self.bt_angle * np.pi/180)
+			buf[1, start] = buf[1, start-1] - dy
+		return None
+
+
+class Heel(Segment):
+	"""Flat base closing the profile down to the center axis"""
+	def count(self, res):
+		return 1
+
+	def fill(self, buf, start, res):
+		buf[0, start] = buf[0, start-1]
+		buf[1, start] = 0
+		return None
+
+
+def profile_segments(R_DICT, L_DICT, rho=None):
+	"""Build the list of segments describing a projectile
+	
+		:param R_DICT: The dictionary containing all the radius values
+		:type R_DICT: dict
+		:param L_DICT: The dictionary containing all the length values
+		:type L_DICT: dict
+		:param rho: ogive radius, mm. Calculated from the base radius and 
+			ogive length if None.
+		:type rho: None, int, float
+		:return segments: The segments in order from the tip to the heel.
+		:rtype segments: list
+	"""
 	R_base = R_DICT['basic'][1]
 	L_ogive = L_DICT['ogive'][1]
 	rn = R_DICT['tip'][1]
-	if rho is None:
-		rho = (R_base**2 + L_ogive**2)/(2*R_base)
+	segments = [NoseCap(R_base=R_base, L_ogive=L_ogive, rn=rn, rho=rho),
+				Ogive(R_base=R_base, L_ogive=L_ogive, rn=rn, rho=rho)]
 	
-	xt, yt, x0, xa = _blunt_tangent_ogive(R_base=R_base, L_ogive=L_ogive,
-										  rn=rn, rho=rho, res=res)
+	if R_DICT['cannelure'][1] != 0 and L_DICT['cannelure'][1] != 0:
+		segments.append(Cannelure(R_cannelure=R_DICT['cannelure'][1],
+								  L_cannelure=L_DICT['cannelure'][1]))
+	if L_DICT['basic'][1] != 0:
+		segments.append(BearingSurface(L_basic=L_DICT['basic'][1]))
 	
-	for i in np.arange(0, L_ogive, L_ogive/res):
-		x = i
-		y = np.sqrt(rho**2 - (L_ogive-x)**2) + R_base - rho
-		x_coords = np.append(x_coords, x)
-		y_coords = np.append(y_coords, y)
-
-	xnose, ynose = _nose_arc(xt=xt, yt=yt, x0=x0, rn=rn, res=res)
-	x_coords = np.append(xnose, x_coords[x_coords>=xt])
-	y_coords = np.append(ynose, y_coords[y_coords>=yt])	
-	xy = np.vstack((x_coords, y_coords))
-
-	if R_DICT['cannelure'][1] == 0 or L_DICT['cannelure'][1] == 0:
-		print('No cannelure')
-	else:
-		xy_out = _cannelure_points(xy=xy, R_cannelure=R_DICT['cannelure'][1], 
-								   L_cannelure=L_DICT['cannelure'][1])
-		xy = np.concatenate((xy, xy_out), axis=1)
-
-	if L_DICT['basic'][1] == 0:
-		print('No straight portion')
-	else:
-		xy_out2 = _straight_points(xy=xy, R_basic=R_DICT['basic'][1], 
-								   L_basic=L_DICT['basic'][1])
-		xy = np.concatenate((xy, xy_out2), axis=1)
-
 	if R_DICT['boat_tail'][1] == 0 or R_DICT['boat_tail'][0] is False:
-		print('No boat tail')
+		pass
 	elif R_DICT['boat_tail'][0] == 'angle':
-		xy_out3 = _boat_tail_points(xy=xy, L_bt=L_DICT['boat_tail'][1],
-									R_bt=None, bt_angle=R_DICT['angle'])
+		segments.append(BoatTail(L_bt=L_DICT['boat_tail'][1],
+								 bt_angle=R_DICT['angle']))
 	else:
-		xy_out3 = _boat_tail_points(xy=xy, L_bt=L_DICT['boat_tail'][1],
-									R_bt=R_DICT['boat_tail'][1], 
-									bt_angle=False)
+		segments.append(BoatTail(L_bt=L_DICT['boat_tail'][1],
+								 R_bt=R_DICT['boat_tail'][1]))
+	segments.append(Heel())
+	return segments
 
-		_x = np.array([xy_out3[0], xy_out3[0]])
-		_y = np.array([xy_out3[1], 0])
-		xy = np.concatenate((xy, np.vstack((_x, _y))), axis=1)			
-	return xy, x0, rn
+
+def assemble(segments, res=1000, dtype=np.float64):
+	"""Assemble a projectile profile from its segments
+	
+		:param segments: The segments in order from the tip to the heel.
+		:type segments: list
+		:param res: Parametric resolution. Default is 1000.
+		:type res: int
+		:param dtype: See :func:`assemble_batch`.
+		:type dtype: np.dtype
+		:return xy: The 2 x n numpy array containing the x-coordinates in 
+			xy[0] and the y-coordinates in xy[1]
+		:rtype xy: np.array()
+	"""
+	return assemble_batch([segments], res=res, dtype=dtype)[0]
 
 
-def _nose_arc(xt, yt, x0, rn, res=100):
-	"""Calculate the parametric coordinates for the nose
+def assemble_batch(designs, res=1000, dtype=np.float64):
+	"""Assemble many projectile profiles into one shared buffer
 	
-		:param xt: x-coord of tangency, mm
-		:type xt: int, float
-		:param yt: y-coord of tangency, mm
-		:type yt: int, float
-		:param x0: x-coord of center of circle which defines the 
-			shape of the nose, mm
-		:type x0: int, float
-		:param rn: nose radius, mm
-		:type rn: int, float
+		:param designs: A list of segment lists, one per projectile.
+		:type designs: list
 		:param res: Parametric resolution. Default is 1000.
 		:type res: int
-		:return xnose: The x-coordinates which define the shape 
-			of the nose, mm.
-		:rtype xnose: np.array()
-		:return ynose: The y-coordinates which define the shape 
-			of the nose, mm.
-		:rtype ynose: np.array()
+		:param dtype: The dtype of the buffer. ``np.float32`` halves the 
+			memory of a large batch. Each design is still built in 
+			float64 and rounded once when it is stored, see 
+			``Python/precision.py`` for the error.
+		:type dtype: np.dtype
+		:return profiles: The 2 x n profile of each design. Each profile 
+			is a view into a single buffer allocated for the whole batch.
+		:rtype profiles: list
 	"""
-	theta0 = 0  # radians
-	theta_t = (np.arctan(yt/(x0-xt)))  # radians
-	theta = np.linspace(theta0, theta_t, res)  # radians
-	xnose = -rn*np.cos(theta) + x0
-	ynose = rn*np.sin(theta)
-	xnose = np.append(xnose[xnose<=xt], xt)
-	ynose = np.append(ynose[ynose<=yt], yt)
-	return xnose, ynose
+	counts = [[seg.count(res) for seg in segments] for segments in designs]
+	sizes = [sum(c) for c in counts]
+	buf = np.empty((2, sum(sizes)), dtype=dtype)
+	if buf.dtype == np.float64:
+		scratch = None
+	else:
+		# The segments read back the previous point, build in float64
+		scratch = np.empty((2, max(sizes, default=0)))
+	profiles = []
+	start = 0
+	for segments, seg_counts in zip(designs, counts):
+		first = start
+		out = buf if scratch is None else scratch
+		pos = start if scratch is None else 0
+		for seg, n in zip(segments, seg_counts):
+			if n:
+				seg.fill(out, pos, res)
+			pos += n
+			start += n
+		if scratch is not None:
+			buf[:, first:start] = scratch[:, :start - first]
+		profiles.append(buf[:, first:start])
+	return profiles
+
+
+def tangent_ogive(R_DICT, L_DICT, rho=None, res=1000, dtype=np.float64, 
+                  **kwargs):
+	"""Calculate the shape of a tangent ogive with nose
+	
+		:param R_DICT: The dictionary containing all the radius values
+		:type R_DICT: dict
+		:param L_DICT: The dictionary containing all the length values
+		:type L_DICT: dict
+		:param res: Parametric resolution. Default is 1000.
+		:type res: int
+		:param dtype: The dtype of xy. See :func:`assemble_batch`.
+		:type dtype: np.dtype
+		:return xy: The 2 x n numpy array containing the x-coordinates in 
+			xy[0] and the y-coordinates in xy[1]
+		:rtype xy: np.array()
+		:return x0: x-coord of center of circle which defines the shape 
+			of the nose, mm
+		:rtype x0: int, float
+		:return rn: nose radius, mm
+		:rtype rn: int, float
+	"""
+	segments = profile_segments(R_DICT=R_DICT, L_DICT=L_DICT, rho=rho)
+	xy = assemble(segments, res=res, dtype=dtype)
+	return xy, segments[0].x0, segments[0].rn
 
 
 def blunt_ogive_plotter(xy, x0, rn, **kwargs):
@@ -180,109 +413,33 @@ def blunt_ogive_plotter(xy, x0, rn, **kwargs):
 	return fig, ax
 
 
-def _straight_points(R_basic, L_basic, xy):
-	"""Plot the straight portion of the bullet
-	
-		:param R_basic: Radius, mm. Note this should be the 
-			same as ``R['base'][1]``
-		:type R_basic: float, int, None
-		:param L_basic: A 1x2 numpy array specifying the length of the 
-			straight portion, mm. The starting x-coord is L[0], the
-			ending x-coord is L[1].
-		:type L_basic: float, int, None
-		:param xy:
-		:type xy:
-		:returns:
-	"""
-	if R_basic == 0 or L_basic == 0:
-		return xy
-	return np.vstack((xy[0][-1] + L_basic, xy[1][-1]))
-
-
-def _cannelure_points(xy, R_cannelure, L_cannelure):
-	"""Calculate points for the Cannelure
-	
-		:param xy: The n x 2 numpy array containing the 
-			x-coordinates in xy[0] and the y-coordinates 
-			in xy[1]
-		:type xy: np.array
-		:param R_cannelure: i THINK this is radius of the 
-			cannelure from the center axis of the projectile 
-			to the outer edge of the cannelure. MAYBE. It's 
-			been a while...
-		:type R_cannelure: int
-		:param L_cannelure: i THINK this is length of the 
-			cannelure. MAYBE. Again, it's been a while...
-		:type L_cannelure: int
-		:returns: numpy array of the xy coordinate points 
-			representing the cannelure
-	"""
-	if R_cannelure == 0 or L_cannelure == 0:
-		return xy
-	else:
-		y1 = R_cannelure
-		y2 = R_cannelure
-		y3 = xy[1][-1]
-		x1 = xy[0][-1]
-		x2 = x1 + L_cannelure
-		x3 = x1 + L_cannelure
-		x = np.array([x1, x2, x3])
-		y = np.array([y1, y2, y3])
-		return np.vstack((x, y))
-	
-	
-def _boat_tail_points(xy, L_bt, R_bt=None, bt_angle=False):
-	"""Calculate points for the boat tail
-		
-		:param xy: The n x 2 numpy array containing the 
-			x-coordinates in xy[0] and the y-coordinates 
-			in xy[1]
-		:type xy: np.array
-		:param L_bt: Length of the boat tail
-		:type L_bt: int, float
-		:param R_bt: Radius of the boat tail? Maybe?
-		:type R_bt: int, float
-		:param bt_angle: Angle from the horizontal 
-			(maybe?) that the boat tail makes. Give 
-			value in degrees. It will automatically 
-			be converted to radians.
-		:type bt_angle: int, float
-		:raises: ValueError if R_bt is not None and 
-			bt_angle is not False.
-	"""
-	x0 = xy[0][-1]
-	x1 = x0 + L_bt
-	if R_bt is not None:
-		y1 = R_bt
-	elif bt_angle is not False:
-		dy = L_bt * np.tan(bt_angle * np.pi/180)
-		y1 = xy[1][-1] - dy
-	else:
-		raise ValueError('R_bt or bt_angle must be numeric values.')
-	return np.array([x1, y1])
-
-	
-def save_points_to_file(points, fn='m855.csv'):
+def save_points_to_file(points, fn='m855.csv', decimals=None):
 	"""Save the xy-coordinates to a file
 	
 		:param points: The xy-coordinates representing 
 			the axisymmetric profile of the projectile
 		:type points: np.array
-		:param fn: The name of the file to which the points will be saved.
+		:param fn: The name of the file to which the points will be saved. 
+			Relative file names are saved to the User's Downloads directory.
 		:type fn: str, Pathlike
+		:param decimals: Write this many decimals. Default is the full 
+			precision of the points.
+		:type decimals: int, None
 		:returns: None
 	"""
-	fn = Path.home().joinpath(f'Downloads/{fn}')
+	fn = Path.home().joinpath('Downloads', fn)
 	if points.shape[1] != 2:
 		points = points.T
 		msg = f'shape of array is invalid. {points.shape}'
 		assert(points.shape[1] == 2), msg
 	df = pd.DataFrame(data=points, columns=['X', 'Y'])
-	df.to_csv(fn, index=False, header=True, quoting=1)
+	float_format = None if decimals is None else f'%.{decimals}f'
+	df.to_csv(fn, index=False, header=True, quoting=1, 
+	          float_format=float_format)
 	return None
 
 
-def print_to_openscad(xy, filename="polygon_points.scad"):
+def print_to_openscad(xy, filename="polygon_points.scad", decimals=None):
 	"""Print the xy-coordinates to an OpenSCAD file
 	
 		:param xy: The n x 2 numpy array containing the 
@@ -290,13 +447,19 @@ def print_to_openscad(xy, filename="polygon_points.scad"):
 			in xy[1]
 		:type xy: np.array
 		:param filename: The name of the openscad file. 
-			Default is 'polygon_points.scad'
+			Default is 'polygon_points.scad'. Relative file names are 
+			saved to the User's Downloads directory.
 		:type filename: None, str, Pathlike
+		:param decimals: Round the points to this many decimals. Default 
+			is the full precision of the points.
+		:type decimals: int, None
 	"""
 	xy = xy.T
-	if not filename.endswith('.scad'):
-		filename = f'{filename}.scad'
-	openscad_file = Path().home().joinpath(f'Downloads/{filename}')
+	if decimals is not None:
+		xy = np.round(xy.astype(float), decimals) + 0.0
+	openscad_file = Path.home().joinpath('Downloads', filename)
+	if openscad_file.suffix != '.scad':
+		openscad_file = openscad_file.with_name(f'{openscad_file.name}.scad')
 	with open(openscad_file, 'w') as f:
 		f.write("$fa = 0.5;\n$fs = 0.5;\n")
 		f.write(f"translate([0,0,{xy[-1][0]-xy[0][0]}])")
@@ -311,6 +474,58 @@ def print_to_openscad(xy, filename="polygon_points.scad"):
 	return None
 
 
+def caliber_dicts(R, L, caliber):
+	"""Build the radius and length dictionaries from caliber values
+	
+		:param R: The radius values in calibers, keyed by 'tip', 'basic', 
+			'cannelure', 'boat_tail', ...
+		:type R: dict
+		:param L: The length values in calibers, keyed by 'boat_tail', 
+			'basic', 'cannelure' and 'ogive'.
+		:type L: dict
+		:param caliber: The size of 1 caliber, mm.
+		:type caliber: int, float
+		:return: The R_dict and L_dict used by :func:`main`. Each value 
+			is a pair of [calibers, mm].
+		:rtype: tuple
+	"""
+	R = {k: [v, v*caliber] for k, v in R.items()}
+	L = {k: [v, v*caliber] for k, v in L.items()}
+
+	L['OAL'] = [[sum([x[0] for x in L.values()])], 
+				[sum([x[1] for x in L.values()])]]
+	R['rho'] = [(R['basic'][0]**2 + L['ogive'][0]**2)/(2*R['basic'][0]), 
+				(R['basic'][1]**2 + L['ogive'][1]**2)/(2*R['basic'][1])]
+	return R, L
+
+
+def profile_writers(decimals=None):
+	"""The 'scad' and 'csv' writers of the projectile profile
+	
+		Pass them to ``export_coords`` of ``Python/exporters.py`` to write 
+		several formats at the same time from one build. 'binary', 'stl' 
+		and 'png' use the shared writers there. This module does not 
+		import the exporters itself so it still runs on its own. For 
+		example::
+		
+			>>> export_coords(xy.T, fn, ['scad', 'csv', 'stl'], 
+			...               writers=profile_writers())
+	
+		:param decimals: The decimals of the 'scad' and 'csv' text files. 
+			Default is full precision. See 
+			``precision.PrecisionPolicy.decimals``.
+		:type decimals: int, None
+		:return: The writers keyed by format. Each takes the n x 2 points 
+			and a file name.
+		:rtype: dict
+	"""
+	return {
+		'scad': lambda pts, fn: print_to_openscad(pts.T, fn,
+		                                          decimals=decimals),
+		'csv': lambda pts, fn: save_points_to_file(pts, fn,
+		                                           decimals=decimals)}
+
+
 def main(R_dict, L_dict, res=1000, **kwargs):
 	"""Run all the code to make the projectile profile
 	
@@ -330,7 +545,7 @@ def main(R_dict, L_dict, res=1000, **kwargs):
 	"""
 	if 'angle' in kwargs.keys():
 		R_dict['angle'] = kwargs['angle']
-		R_dict['boat_tail'][0] = ['angle']
+		R_dict['boat_tail'][0] = 'angle'
 
 	R_base = R_dict['basic'][1]
 	L_ogive = L_dict['ogive'][1]
@@ -352,14 +567,8 @@ if __name__ == "__main__":
 	caliber = 5.69  # 1 caliber = 5.69mm
 	R = {'tip': 0.13/2, 'ogive': np.nan, 'basic': 1/2, 'cannelure': 0.9/2, 
 		 'boat_tail': 0.8/2, 'heel': 0.13}
-	R = {k: [v, v*caliber] for k, v in R.items()}
 	L = {'boat_tail': 0.49, 'basic': 1.2, 'cannelure': 0.2, 'ogive': 2.17}
-	L = {k: [v, v*caliber] for k, v in L.items()}
-
-	L['OAL'] = [[sum([x[0] for x in L.values()])], 
-				[sum([x[1] for x in L.values()])]]
-	R['rho'] = [(R['basic'][0]**2 + L['ogive'][0]**2)/(2*R['basic'][0]), 
-				(R['basic'][1]**2 + L['ogive'][1]**2)/(2*R['basic'][1])]
+	R, L = caliber_dicts(R, L, caliber)
 	
 	main_kw = {'title': 'M855', 'fn': 'm855.csv', 'openscad': 'm855_62gr'}
 	xy = main(R_dict=R, L_dict=L, res=1000, **main_kw)
@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+
+"""
+Batch Runner
+
+Command line tool that builds many nosecones, transitions and projectiles
+from a job file. The jobs run concurrently in a process pool. A manifest
+kept in each output directory records a hash of every job and of the
+code that built it, so jobs whose inputs and code are unchanged since the
+last run are skipped.
+
+
+Usage:
+------
+python batch_runner.py jobs.yaml [--workers N] [--force] [--manifest FILE]
+
+
+Job File:
+---------
+A YAML or JSON file (YAML needs PyYAML). ``output_dir`` and ``formats``
+at the top level are defaults for every job. Relative output directories
+are relative to the job file. For example::
+
+	output_dir: parts
+	formats: [scad]
+	jobs:
+	  - name: nosecone_4to1
+	    type: nosecone
+	    formats: [scad, csv, png]
+	    params: {base_radius: 33, tip_radius: 10, k: 3, shoulder_radius: 23,
+	             shoulder_length: 50, ar: 4, res: 500, shape: tangent_ogive}
+	  - name: transition_40_24
+	    type: transition
+	    params: {aft_shoulder_diameter: 38, aft_diameter: 40,
+	             fore_diameter: 24, fore_shoulder_diameter: 22,
+	             aft_shoulder_length: 40, fore_shoulder_length: 24, k: 1,
+	             theta: 30}
+	  - name: m855
+	    type: projectile
+	    formats: [scad, csv]
+	    params: {caliber: 5.69, res: 1000,
+	             R: {tip: 0.065, basic: 0.5, cannelure: 0.45,
+	                 boat_tail: 0.4},
+	             L: {boat_tail: 0.49, basic: 1.2, cannelure: 0.2,
+	                 ogive: 2.17}}
+
+``params`` are passed to ``Nosecone`` and ``Transition``. Projectile
+``R`` and ``L`` values are given in calibers, see
+``boolit.caliber_dicts``.
+
+
+Formats:
+--------
+Every job type can be written as scad, csv, binary (.npy), stl and png. 
+The formats of a job are written concurrently, see ``exporters.py``.
+"""
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+import argparse
+import hashlib
+import json
+import time
+import sys
+
+try:
+	import yaml
+except ImportError:
+	yaml = None
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'BulletPlotter'))
+
+from nosecone_maker2 import Nosecone, Transition
+from exporters import export_coords
+import boolit
+
+
+MANIFEST = '.batch_manifest.json'
+
+CODE_FILES = [Path(__file__).resolve(),
+              Path(__file__).resolve().with_name('nosecone_maker2.py'),
+              Path(__file__).resolve().with_name('nose_shapes.py'),
+              Path(__file__).resolve().with_name('exporters.py'),
+              Path(__file__).resolve().with_name('precision.py'),
+              Path(boolit.__file__).resolve()]
+
+
+def code_version():
+	"""Return a hash of the source files that build the parts"""
+	h = hashlib.sha256()
+	for fn in CODE_FILES:
+		h.update(fn.read_bytes())
+	return h.hexdigest()[:16]
+
+
+def job_key(job, version):
+	"""Return a hash of a job and the code version that builds it
+
+		:param job: The job definition.
+		:type job: dict
+		:param version: See :func:`code_version`.
+		:type version: str
+	"""
+	text = json.dumps(job, sort_keys=True, default=str)
+	return hashlib.sha256(f'{version}:{text}'.encode()).hexdigest()[:16]
+
+
+def load_jobs(fn):
+	"""Read a job file and fill in the defaults of each job
+
+		:param fn: The YAML or JSON job file.
+		:type fn: Pathlike, str
+		:return: The list of jobs. Each job has ``name``, ``type``,
+			``params``, ``formats`` and an absolute ``output_dir``.
+		:rtype: list
+		:raises: ValueError if a job is missing its name or type or two
+			jobs share a name.
+	"""
+	fn = Path(fn)
+	text = fn.read_text()
+	if fn.suffix.lower() in ['.yaml', '.yml']:
+		if yaml is None:
+			raise ImportError('PyYAML is needed to read YAML job files. '
+			                  'Install it or use a JSON job file.')
+		spec = yaml.safe_load(text)
+	else:
+		spec = json.loads(text)
+
+	default_dir = spec.get('output_dir', '.')
+	default_formats = spec.get('formats', ['scad'])
+	jobs = []
+	names = set()
+	for job in spec['jobs']:
+		if 'name' not in job or 'type' not in job:
+			raise ValueError(f'Every job needs a name and a type: {job}')
+		if job['name'] in names:
+			raise ValueError(f'Duplicate job name "{job["name"]}"')
+		names.add(job['name'])
+		out_dir = Path(job.get('output_dir', default_dir)).expanduser()
+		if not out_dir.is_absolute():
+			out_dir = fn.resolve().parent / out_dir
+		jobs.append({'name': job['name'], 'type': job['type'],
+		             'params': job.get('params', {}),
+		             'formats': list(job.get('formats', default_formats)),
+		             'output_dir': str(out_dir)})
+	return jobs
+
+
+def _build_part(job):
+	"""Build the part of a job
+
+		:return: The n x 2 coordinate pairs and a callable that writes a
+			list of formats to a file stem.
+		:rtype: tuple
+	"""
+	params = dict(job['params'])
+	if job['type'] == 'nosecone':
+		part = Nosecone(**params)
+		part.build_nosecone()
+	elif job['type'] == 'transition':
+		part = Transition(**params)
+		part.build_transition()
+	elif job['type'] == 'projectile':
+		R, L = boolit.caliber_dicts(params['R'], params['L'],
+		                            params.get('caliber', 1))
+		if 'angle' in params:
+			R['angle'] = params['angle']
+			R['boat_tail'][0] = 'angle'
+		xy, _, _ = boolit.tangent_ogive(R_DICT=R, L_DICT=L,
+		                                res=params.get('res', 1000))
+		return xy.T, lambda formats, fn: export_coords(
+			xy.T, fn, formats, writers=boolit.profile_writers())
+	else:
+		raise ValueError(f'Unknown job type "{job["type"]}"')
+	return part.coord_pairs, lambda formats, fn: part.export(formats, fn=fn)
+
+
+def run_job(job):
+	"""Build one job and write its output files
+
+		:param job: The job definition. See :func:`load_jobs`.
+		:type job: dict
+		:return: The job name, the files written and the number of
+			coordinate points.
+		:rtype: dict
+	"""
+	coord_pairs, export = _build_part(job)
+	files = export(job['formats'], Path(job['output_dir']) / job['name'])
+	return {'name': job['name'], 'files': [str(f) for f in files.values()],
+	        'points': int(coord_pairs.shape[0])}
+
+
+def _read_manifest(fn):
+	try:
+		return json.loads(Path(fn).read_text())
+	except (FileNotFoundError, json.JSONDecodeError):
+		return {}
+
+
+def run_batch(jobs, workers=None, force=False, manifest=None):
+	"""Run the jobs that changed since the last run
+
+		:param jobs: The jobs. See :func:`load_jobs`.
+		:type jobs: list
+		:param workers: The number of worker processes. Default is the
+			number of CPUs.
+		:type workers: int, None
+		:param force: Run every job even if it is unchanged.
+		:type force: bool
+		:param manifest: The manifest file. Default is ``MANIFEST`` in
+			the output directory of each job.
+		:type manifest: Pathlike, str, None
+		:return: A summary of the run.
+		:rtype: dict
+	"""
+	version = code_version()
+	manifests = {}
+	todo = []
+	skipped = []
+	for job in jobs:
+		mfn = str(manifest or Path(job['output_dir']) / MANIFEST)
+		if mfn not in manifests:
+			manifests[mfn] = _read_manifest(mfn)
+		key = job_key(job, version)
+		entry = manifests[mfn].get(job['name'])
+		if (not force and entry is not None and entry['key'] == key and
+				all(Path(f).exists() for f in entry['files'])):
+			skipped.append(job['name'])
+		else:
+			todo.append((job, mfn, key))
+
+	summary = {'version': version, 'run': [], 'skipped': skipped,
+	           'failed': {}, 'points': 0, 'files': 0}
+	t0 = time.perf_counter()
+	if todo:
+		with ProcessPoolExecutor(max_workers=workers) as pool:
+			futures = {pool.submit(run_job, job): (job, mfn, key)
+			           for job, mfn, key in todo}
+			for future in as_completed(futures):
+				job, mfn, key = futures[future]
+				try:
+					result = future.result()
+				except Exception as e:
+					summary['failed'][job['name']] = repr(e)
+					manifests[mfn].pop(job['name'], None)
+					continue
+				summary['run'].append(job['name'])
+				summary['points'] += result['points']
+				summary['files'] += len(result['files'])
+				manifests[mfn][job['name']] = {
+					'key': key, 'files': result['files'],
+					'points': result['points'], 'built': time.time()}
+	summary['elapsed'] = time.perf_counter() - t0
+
+	for mfn, data in manifests.items():
+		Path(mfn).parent.mkdir(parents=True, exist_ok=True)
+		Path(mfn).write_text(json.dumps(data, indent=1, sort_keys=True))
+	return summary
+
+
+def print_summary(summary):
+	"""Print the throughput of a run"""
+	n_run = len(summary['run'])
+	elapsed = summary['elapsed']
+	rate = n_run/elapsed if elapsed > 0 else 0
+	print(f"Code version: {summary['version']}")
+	print(f"Jobs run: {n_run}, skipped (unchanged): "
+	      f"{len(summary['skipped'])}, failed: {len(summary['failed'])}")
+	print(f"Files written: {summary['files']}, points: {summary['points']}")
+	print(f"Elapsed: {elapsed:.2f} s, {rate:.1f} jobs/s, "
+	      f"{summary['points']/max(elapsed, 1e-9):.0f} points/s")
+	for name, err in summary['failed'].items():
+		print(f"  FAILED {name}: {err}")
+	return None
+
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(
+		description='Build nosecones, transitions and projectiles from a '
+		            'job file.')
+	parser.add_argument('job_file', help='YAML or JSON job file')
+	parser.add_argument('-w', '--workers', type=int, default=None,
+	                    help='number of worker processes (default: CPUs)')
+	parser.add_argument('-f', '--force', action='store_true',
+	                    help='rebuild jobs even if they are unchanged')
+	parser.add_argument('-m', '--manifest', default=None,
+	                    help='manifest file (default: '
+	                         f'<output_dir>/{MANIFEST})')
+	args = parser.parse_args(argv)
+
+	jobs = load_jobs(args.job_file)
+	summary = run_batch(jobs, workers=args.workers, force=args.force,
+	                    manifest=args.manifest)
+	print_summary(summary)
+	return 1 if summary['failed'] else 0
+
+
+if __name__ == "__main__":
+	sys.exit(main())
@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+
+"""
+Clustered Centering Rings
+
+Layouts of clustered motor tubes inside an airframe. Supersedes
+``JupyterLab_prototypes/clustered_centering_rings.ipynb``.
+
+A packing is a set of unit tube centers where the closest pair of tubes
+is 1 unit apart. Scaling a packing by the tube pitch (tube diameter plus
+the gap between tubes) gives the tube centers in millimeters. All the
+candidate packings for ``n`` tubes are stacked into one array so the fit
+of every layout, and the clearance between every pair of tubes, is found
+with a handful of array operations.
+
+
+Packing Families:
+-----------------
+row		Tubes side by side in a single row
+ring	Tubes evenly spaced on a circle
+star	One center tube with the rest evenly spaced on a circle around it
+square	The n points of a square grid closest to its center
+hex		The n points of a hexagonal grid closest to its center
+
+
+Example:
+--------
+>>> max_tube_diameter(n=4, airframe_diameter=98, gap=2, edge_gap=3)
+>>> ring = best_layout(n=4, airframe_diameter=98, tube_diameter=29, gap=2,
+...                    edge_gap=3)
+>>> ring.to_scad('cluster_4x29.scad', thickness=6)
+>>> ring.to_dxf('cluster_4x29.dxf')
+"""
+
+from matplotlib.collections import PatchCollection
+import matplotlib.pyplot as plt
+import numpy as np
+
+from exporters import output_path
+
+
+def _row(n):
+	x = np.arange(n) - (n - 1)/2
+	return np.column_stack((x, np.zeros(n)))
+
+
+def _circle(n, radius, phase=0.0):
+	theta = 2*np.pi*np.arange(n)/n + phase
+	return radius*np.column_stack((np.sin(theta), np.cos(theta)))
+
+
+def _ring(n):
+	if n < 2:
+		return None
+	return _circle(n, 1/(2*np.sin(np.pi/n)))
+
+
+def _star(n):
+	if n < 4:
+		return None
+	radius = max(1.0, 1/(2*np.sin(np.pi/(n - 1))))
+	return np.concatenate((np.zeros((1, 2)), _circle(n - 1, radius)))
+
+
+def _nearest_lattice(n, basis):
+	"""Take the n points of a lattice closest to a center
+
+		The center is tried on a lattice point, on the middle of an edge
+		and in the middle of a cell, and the selection with the smallest
+		outer radius is kept. A lattice point only suits an odd number of
+		tubes that fills whole rings, so for example 4 tubes on a square
+		grid are a 2 x 2 block, not a T.
+	"""
+	m = int(np.ceil(np.sqrt(n))) + 2
+	i, j = np.meshgrid(np.arange(-m, m + 1), np.arange(-m, m + 1))
+	pts = np.column_stack((i.ravel(), j.ravel())) @ basis
+	origins = np.array([[0, 0], [0.5, 0], [0.5, 0.5], [1/3, 1/3]]) @ basis
+	d = np.hypot(*(pts - origins[:, np.newaxis, :]).transpose(2, 0, 1))
+	take = np.argsort(d, axis=-1, kind='stable')[:, :n]
+	choices = pts[take]
+	choices -= choices.mean(axis=1, keepdims=True)
+	radius = np.hypot(choices[..., 0], choices[..., 1])
+	# Smallest outer radius first, then the most compact selection
+	key = np.round(radius.max(axis=-1), 9) + 1e-3*np.mean(radius**2, axis=-1)
+	return choices[np.argmin(key)]
+
+
+def _square(n):
+	if n < 4:
+		return None
+	return _nearest_lattice(n, np.eye(2))
+
+
+def _hex(n):
+	if n < 4:
+		return None
+	return _nearest_lattice(n, np.array([[1, 0], [0.5, np.sqrt(3)/2]]))
+
+
+PACKINGS = {'row': _row, 'ring': _ring, 'star': _star, 'square': _square,
+            'hex': _hex}
+
+
+def packing(family, n):
+	"""Return the unit tube centers of a packing
+
+		:param family: The packing family. See ``PACKINGS``.
+		:type family: str
+		:param n: The number of tubes.
+		:type n: int
+		:return: The n x 2 array of tube centers, or None if the family
+			has no layout for n tubes.
+		:rtype: np.array, None
+	"""
+	try:
+		return PACKINGS[family](n)
+	except KeyError:
+		raise ValueError(f'Unknown packing "{family}". Choose one of '
+		                 f'{sorted(PACKINGS)}') from None
+
+
+def candidate_layouts(n):
+	"""Return every packing family that has a layout for n tubes
+
+		:param n: The number of tubes.
+		:type n: int
+		:return: The family names and the L x n x 2 array of unit tube
+			centers of each of the L layouts.
+		:rtype: tuple
+	"""
+	names = []
+	centers = []
+	for family in PACKINGS:
+		pts = packing(family, n)
+		if pts is not None:
+			names.append(family)
+			centers.append(pts)
+	return names, np.stack(centers)
+
+
+def layout_metrics(centers):
+	"""Measure a batch of layouts
+
+		:param centers: The tube centers with shape (..., n, 2).
+		:type centers: np.array
+		:return: The distance from the airframe axis to the farthest tube
+			center and the smallest distance between two tube centers of
+			each layout. The smallest distance is inf for a single tube.
+		:rtype: tuple
+	"""
+	r_max = np.max(np.hypot(centers[..., 0], centers[..., 1]), axis=-1)
+	d = centers[..., :, np.newaxis, :] - centers[..., np.newaxis, :, :]
+	dist = np.hypot(d[..., 0], d[..., 1])
+	n = centers.shape[-2]
+	dist[..., np.arange(n), np.arange(n)] = np.inf
+	return r_max, np.min(dist, axis=(-2, -1))
+
+
+def max_tube_diameter(n, airframe_diameter, gap=0, edge_gap=0):
+	"""Find the largest motor tube that fits with each layout
+
+		The tubes fit when the farthest tube leaves ``edge_gap`` to the
+		airframe wall and the closest pair of tubes leave ``gap`` between
+		them.
+
+		:param n: The number of tubes.
+		:type n: int
+		:param airframe_diameter: The airframe inner diameter, mm.
+		:type airframe_diameter: int, float, np.array
+		:param gap: Clearance between neighbouring tubes, mm.
+		:type gap: int, float
+		:param edge_gap: Clearance between the tubes and the airframe, mm.
+		:type edge_gap: int, float
+		:return: The largest tube outer diameter of each layout, mm. A
+			value <= 0 means no tube fits.
+		:rtype: dict
+	"""
+	names, centers = candidate_layouts(n)
+	r_max, d_min = layout_metrics(centers)
+	# Tube centers scale with the pitch (tube diameter + gap)
+	ratio = r_max/d_min
+	airframe_diameter = np.asarray(airframe_diameter, dtype=float)
+	fit = ((airframe_diameter[..., np.newaxis]/2 - edge_gap - gap*ratio) /
+	       (ratio + 0.5))
+	return dict(zip(names, np.moveaxis(fit, -1, 0)))
+
+
+def min_airframe_diameter(n, tube_diameter, gap=0, edge_gap=0):
+	"""Find the smallest airframe that fits the tubes with each layout
+
+		:param n: The number of tubes.
+		:type n: int
+		:param tube_diameter: The motor tube outer diameter, mm.
+		:type tube_diameter: int, float, np.array
+		:param gap: Clearance between neighbouring tubes, mm.
+		:type gap: int, float
+		:param edge_gap: Clearance between the tubes and the airframe, mm.
+		:type edge_gap: int, float
+		:return: The smallest airframe inner diameter of each layout, mm.
+		:rtype: dict
+	"""
+	names, centers = candidate_layouts(n)
+	r_max, d_min = layout_metrics(centers)
+	tube_diameter = np.asarray(tube_diameter, dtype=float)[..., np.newaxis]
+	af = 2*((tube_diameter + gap)*r_max/d_min + tube_diameter/2 + edge_gap)
+	return dict(zip(names, np.moveaxis(af, -1, 0)))
+
+
+def best_layout(n, airframe_diameter, tube_diameter, gap=0, edge_gap=0):
+	"""Pick the layout that leaves the most room for the tubes
+
+		:param n: The number of tubes.
+		:type n: int
+		:param airframe_diameter: The airframe inner diameter, mm.
+		:type airframe_diameter: int, float
+		:param tube_diameter: The motor tube outer diameter, mm.
+		:type tube_diameter: int, float
+		:param gap: Clearance between neighbouring tubes, mm.
+		:type gap: int, float
+		:param edge_gap: Clearance between the tubes and the airframe, mm.
+		:type edge_gap: int, float
+		:rtype: CenteringRing
+		:raises: ValueError if the tubes do not fit with any layout.
+	"""
+	fits = max_tube_diameter(n, airframe_diameter, gap=gap,
+	                         edge_gap=edge_gap)
+	family = max(fits, key=fits.get)
+	if fits[family] < tube_diameter:
+		raise ValueError(f'{n} tubes of {tube_diameter} mm do not fit in a '
+		                 f'{airframe_diameter} mm airframe. The largest tube '
+		                 f'that fits is {fits[family]:.2f} mm ({family}).')
+	return CenteringRing(airframe_diameter, tube_diameter,
+	                     packing(family, n), gap=gap, family=family)
+
+
+class CenteringRing:
+	"""Centering ring for a cluster of motor tubes
+
+		Unless otherwise noted all measurements are given in millimeters.
+
+		:param airframe_diameter: The airframe inner diameter. This is the
+			outer diameter of the ring.
+		:type airframe_diameter: int, float
+		:param tube_diameter: The motor tube outer diameter. This is the
+			diameter of each hole in the ring.
+		:type tube_diameter: int, float
+		:param packing: The n x 2 array of unit tube centers.
+		:type packing: np.array
+		:param gap: Clearance between neighbouring tubes.
+		:type gap: int, float
+		:param family: The name of the packing family, for reference.
+		:type family: str, None
+	"""
+	def __init__(self, airframe_diameter, tube_diameter, packing, gap=0,
+	             family=None):
+		self.airframe_diameter = airframe_diameter
+		self.tube_diameter = tube_diameter
+		self.gap = gap
+		self.family = family
+		packing = np.asarray(packing, dtype=float).reshape(-1, 2)
+		_, d_min = layout_metrics(packing)
+		scale = (tube_diameter + gap)/d_min if np.isfinite(d_min) else 0
+		self.centers = packing*scale
+
+	def __repr__(self):
+		r = (f"CenteringRing(airframe_diameter={self.airframe_diameter}, "
+		     f"tube_diameter={self.tube_diameter}, n={len(self.centers)}, "
+		     f"gap={self.gap}, family={self.family!r})")
+		return r
+
+	@property
+	def clearances(self):
+		"""The clearance between every pair of tubes and between each tube
+			and the airframe
+
+			:return: The n x n matrix of tube to tube clearances (inf on
+				the diagonal) and the n tube to airframe clearances.
+			:rtype: tuple
+		"""
+		d = self.centers[:, np.newaxis, :] - self.centers[np.newaxis, :, :]
+		tube = np.hypot(d[..., 0], d[..., 1]) - self.tube_diameter
+		np.fill_diagonal(tube, np.inf)
+		edge = (self.airframe_diameter/2 - self.tube_diameter/2 -
+		        np.hypot(self.centers[:, 0], self.centers[:, 1]))
+		return tube, edge
+
+	@property
+	def fits(self):
+		"""True if no tubes overlap each other or the airframe"""
+		tube, edge = self.clearances
+		return bool(np.all(tube >= -1e-9) and np.all(edge >= -1e-9))
+
+	def scad(self, thickness=5):
+		"""Return the OpenSCAD source of the ring
+
+			:param thickness: The ring thickness.
+			:type thickness: int, float
+			:rtype: str
+		"""
+		holes = ''.join(f'\t\ttranslate([{x},{y}]) circle(d='
+		                f'{self.tube_diameter});\n'
+		                for x, y in self.centers.tolist())
+		return (f"linear_extrude(height={thickness})\n"
+		        f"\tdifference() {{\n"
+		        f"\t\tcircle(d={self.airframe_diameter});\n"
+		        f"{holes}"
+		        f"\t}}\n")
+
+	def to_scad(self, fn, thickness=5):
+		"""Write the ring to an OpenSCAD file
+
+			:param fn: The file to write the data to. Relative file names
+				are saved to the User's Downloads directory.
+			:type fn: Pathlike, str
+			:param thickness: The ring thickness.
+			:type thickness: int, float
+		"""
+		fn = output_path(fn)
+		with open(fn, mode='w', newline='') as fout:
+			fout.write(self.scad(thickness=thickness))
+		print(f'File created: "{fn}"')
+		return None
+
+	def to_dxf(self, fn):
+		"""Write the ring outline to an ASCII DXF file
+
+			The outline is written as CIRCLE entities on layer 0, one for
+			the airframe and one for each tube.
+
+			:param fn: The file to write the data to. Relative file names
+				are saved to the User's Downloads directory.
+			:type fn: Pathlike, str
+		"""
+		circles = [(0.0, 0.0, self.airframe_diameter/2)]
+		circles += [(x, y, self.tube_diameter/2)
+		            for x, y in self.centers.tolist()]
+		entities = ''.join(f'0\nCIRCLE\n8\n0\n10\n{x}\n20\n{y}\n30\n0.0\n'
+		                   f'40\n{r}\n' for x, y, r in circles)
+		fn = output_path(fn)
+		with open(fn, mode='w', newline='') as fout:
+			fout.write(f'0\nSECTION\n2\nENTITIES\n{entities}0\nENDSEC\n'
+			           f'0\nEOF\n')
+		print(f'File created: "{fn}"')
+		return None
+
+	def plot(self, fn=None):
+		"""Plot the ring
+
+			:param fn: The filename to save the plot to.
+			:type fn: None, Pathlike, str
+		"""
+		fig, ax = plt.subplots()
+		ax.add_patch(plt.Circle((0, 0), self.airframe_diameter/2,
+		                        fill=False))
+		tubes = [plt.Circle(xy, self.tube_diameter/2)
+		         for xy in self.centers.tolist()]
+		ax.add_collection(PatchCollection(tubes, facecolor='none',
+		                                  edgecolor='b'))
+		ax.set_aspect('equal')
+		ax.autoscale_view()
+		ax.set_title(f'{len(self.centers)} x {self.tube_diameter} mm '
+		             f'({self.family})')
+		if fn is not None:
+			fig.savefig(fn)
+		plt.show()
+		return fig
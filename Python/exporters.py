@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+
+"""
+Exporters
+
+Writers shared by the nosecone, transition and projectile makers. Every 
+writer takes the n x 2 array of profile coordinates (x along the axis of 
+revolution, y the radius) and a file name. The profile is a closed 
+polygon, the last point connects back to the first.
+
+:func:`export_coords` writes several formats from one build at the same 
+time on a thread pool. The writers only read the coordinates, so they all 
+share a single read-only copy of them.
+
+
+Formats:
+--------
+scad	OpenSCAD rotate_extrude polygon
+csv		x, y, z text coordinates
+binary	NumPy .npy array of the coordinates
+stl		Binary STL of the revolved profile
+png		Plot of the cross section
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from matplotlib.figure import Figure
+from pathlib import Path
+import numpy as np
+
+
+EXTENSIONS = {'scad': '.scad', 'csv': '.csv', 'binary': '.npy', 
+              'stl': '.stl', 'png': '.png'}
+
+STL_RECORD = np.dtype([('normal', '<f4', (3,)), ('vertices', '<f4', (3, 3)),
+                       ('attribute', '<u2')])
+
+
+def output_path(fn):
+	"""Resolve the path of an output file
+	
+		Relative file names are saved to the User's Downloads directory. 
+		Absolute paths are used as given.
+	
+		:param fn: The name of the output file.
+		:type fn: Pathlike, str
+		:rtype: Path
+	"""
+	return Path.home().joinpath('Downloads', fn)
+
+
+def scad_polygon(coord_pairs, rotate=-90, translate=0, segments=200, 
+                 decimals=None):
+	"""Format coordinate pairs as a revolved OpenSCAD polygon
+	
+		:param coord_pairs: The n x 2 array of x and y coordinates.
+		:type coord_pairs: np.array
+		:param rotate: Rotation about the Z-axis applied to the polygon 
+			before it is revolved, degrees.
+		:type rotate: int, float
+		:param translate: Translation along the X-axis applied to the 
+			polygon before it is rotated.
+		:type translate: int, float
+		:param segments: The number of segments around the axis, 
+			``$fn``.
+		:type segments: int
+		:param decimals: Round the coordinates to this many decimals. 
+			Default is the full precision of the coordinates. See 
+			``precision.PrecisionPolicy.decimals``.
+		:type decimals: int, None
+		:return: The OpenSCAD source.
+		:rtype: str
+	"""
+	coord_pairs = np.asarray(coord_pairs)
+	if decimals is not None:
+		coord_pairs = np.round(coord_pairs.astype(float), decimals) + 0.0
+	rows = '],\n\t\t\t\t\t['.join(
+		','.join(pair) for pair in coord_pairs.astype(str).tolist())
+	return (f"rotate_extrude($fn={segments})\n"
+	        f"\trotate([0,0,{rotate}])\n"
+	        f"\t\ttranslate([{translate},0,0])\n"
+	        f"\t\t\tpolygon(\n"
+	        f"\t\t\t\tpoints=[\n"
+	        f"\t\t\t\t\t[{rows}]\n"
+	        f"\t\t\t\t]\n"
+	        f"\t\t\t);")
+
+
+def write_scad(coord_pairs, fn, rotate=-90, translate=0, segments=200, 
+               decimals=None):
+	"""Write coordinate pairs to an OpenSCAD file
+	
+		:param coord_pairs: The n x 2 array of x and y coordinates.
+		:type coord_pairs: np.array
+		:param fn: The file to write the data to.
+		:type fn: Pathlike, str
+		:param rotate: See :func:`scad_polygon`.
+		:type rotate: int, float
+		:param translate: See :func:`scad_polygon`.
+		:type translate: int, float
+		:param segments: See :func:`scad_polygon`.
+		:type segments: int
+		:param decimals: See :func:`scad_polygon`.
+		:type decimals: int, None
+	"""
+	with open(fn, mode='w', newline='') as fout:
+		fout.write(scad_polygon(coord_pairs, rotate=rotate, 
+		                        translate=translate, segments=segments, 
+		                        decimals=decimals))
+	print(f'File created: "{fn}"')
+	return None
+
+
+def write_csv(coord_pairs, fn, base_plane='xy'):
+	"""Write coordinate pairs to a .csv file of x, y, z coordinates
+	
+		:param coord_pairs: The n x 2 array of x and y coordinates.
+		:type coord_pairs: np.array
+		:param fn: The file to write the data to.
+		:type fn: Pathlike, str
+		:param base_plane: The coordinate plane in which the base of the 
+			part is drawn. Default is 'xy' plane.
+		:type base_plane: str
+	"""
+	n_rows = coord_pairs.shape[0]
+	xyz = np.zeros(shape=[n_rows, 3])
+	if base_plane.lower() in ['xy', 'yx']:
+		# Output the base in the XY plane. Add all zeros for the Z axis.
+		xyz[:, :2] = coord_pairs
+	elif base_plane.lower() in ['xz', 'zx']:
+		# The y-column is the zero column. Swap the Y and Z columns.
+		xyz[:, 0] = coord_pairs[:, 0]
+		xyz[:, 2] = coord_pairs[:, 1]
+	elif base_plane.lower() in ['yz', 'zy']:
+		# The x-column is the zero columns. Swap the X and Z columns.
+		xyz[:, 1] = coord_pairs[:, 1]
+		xyz[:, 2] = coord_pairs[:, 0]
+	with open(fn, mode='w', newline='') as fout:
+		fout.write(('%.4f,%.4f,%.4f\n' * n_rows) % tuple(xyz.ravel()))
+	return None
+
+
+def write_npy(coord_pairs, fn):
+	"""Write coordinate pairs to a binary NumPy .npy file
+	
+		:param coord_pairs: The n x 2 array of x and y coordinates.
+		:type coord_pairs: np.array
+		:param fn: The file to write the data to.
+		:type fn: Pathlike, str
+	"""
+	with open(fn, mode='wb') as fout:
+		np.save(fout, coord_pairs)
+	return None
+
+
+def _revolve(coord_pairs, segments):
+	"""Return the triangles of the revolved profile and their normals"""
+	x = coord_pairs[:, 0]
+	y = coord_pairs[:, 1]
+	# Make the profile counter-clockwise in the (z, r) plane so the 
+	# triangles below face outwards
+	if np.sum(x*np.roll(y, -1) - np.roll(x, -1)*y) < 0:
+		x = x[::-1]
+		y = y[::-1]
+	phi = 2*np.pi*np.arange(segments + 1)/segments
+	cos = np.cos(phi)
+	sin = np.sin(phi)
+	cos[-1], sin[-1] = 1.0, 0.0
+	
+	# Vertex grid, profile point i at angle j
+	pts = np.empty((x.size + 1, segments + 1, 3), dtype=np.float32)
+	pts[:-1, :, 0] = y[:, np.newaxis]*cos
+	pts[:-1, :, 1] = y[:, np.newaxis]*sin
+	pts[:-1, :, 2] = x[:, np.newaxis]
+	pts[-1] = pts[0]
+	
+	# Two triangles per quad, (a, b, c) and (a, c, d)
+	tris = np.empty((2, x.size, segments, 3, 3), dtype=np.float32)
+	tris[:, :, :, 0] = pts[:-1, :-1]
+	tris[0, :, :, 1] = pts[1:, :-1]
+	tris[0, :, :, 2] = pts[1:, 1:]
+	tris[1, :, :, 1] = pts[1:, 1:]
+	tris[1, :, :, 2] = pts[:-1, 1:]
+	tris = tris.reshape(-1, 3, 3)
+	
+	normals = np.cross(tris[:, 1] - tris[:, 0], tris[:, 2] - tris[:, 0])
+	length = np.sqrt(np.einsum('ij,ij->i', normals, normals))
+	keep = length > 0
+	normals = normals[keep]
+	normals /= length[keep, np.newaxis]
+	return tris[keep], normals
+
+
+def revolve_mesh(coord_pairs, segments=200, normals=False):
+	"""Revolve a closed profile about its x-axis into a triangle mesh
+	
+		The mesh axis is the Z-axis, ``z = x`` and the radius is ``y``. 
+		Triangles with no area (edges lying on the axis) are dropped and 
+		the triangles are wound so their normals point out of the solid.
+	
+		:param coord_pairs: The n x 2 array of x and y coordinates.
+		:type coord_pairs: np.array
+		:param segments: The number of segments around the axis. Same as 
+			``$fn`` in OpenSCAD.
+		:type segments: int
+		:param normals: If True also return the m x 3 array of unit 
+			normals.
+		:type normals: bool
+		:return: The m x 3 x 3 array of triangle vertices.
+		:rtype: np.array, tuple
+	"""
+	tris, tri_normals = _revolve(coord_pairs, segments)
+	if normals:
+		return tris, tri_normals
+	return tris
+
+
+def write_stl(coord_pairs, fn, segments=200):
+	"""Write the revolved profile to a binary STL file
+	
+		:param coord_pairs: The n x 2 array of x and y coordinates.
+		:type coord_pairs: np.array
+		:param fn: The file to write the data to.
+		:type fn: Pathlike, str
+		:param segments: See :func:`revolve_mesh`.
+		:type segments: int
+	"""
+	write_triangles(*_revolve(coord_pairs, segments), fn=fn)
+	return None
+
+
+def write_triangles(tris, normals, fn):
+	"""Write a triangle mesh to a binary STL file
+	
+		:param tris: The m x 3 x 3 array of triangle vertices.
+		:type tris: np.array
+		:param normals: The m x 3 array of unit normals.
+		:type normals: np.array
+		:param fn: The file to write the data to.
+		:type fn: Pathlike, str
+	"""
+	records = np.empty(len(tris), dtype=STL_RECORD)
+	records['normal'] = normals
+	records['vertices'] = tris
+	records['attribute'] = 0
+	with open(fn, mode='wb') as fout:
+		fout.write(b'binary STL'.ljust(80, b' '))
+		fout.write(np.uint32(len(tris)).tobytes())
+		fout.write(records.tobytes())
+	return None
+
+
+def write_png(coord_pairs, fn):
+	"""Plot the closed cross section to an image file
+	
+		The figure is made without pyplot so plots can be saved from 
+		several threads at once.
+	
+		:param coord_pairs: The n x 2 array of x and y coordinates.
+		:type coord_pairs: np.array
+		:param fn: The file to write the plot to.
+		:type fn: Pathlike, str
+	"""
+	fig = Figure(figsize=(13,6), dpi=150)
+	ax = fig.add_subplot(111)
+	ax.grid()
+	ax.plot(np.append(coord_pairs[:, 0], coord_pairs[0, 0]), 
+	        np.append(coord_pairs[:, 1], coord_pairs[0, 1]), color='g')
+	ax.set_aspect('equal')
+	fig.savefig(fn)
+	return None
+
+
+def export_coords(coord_pairs, stem, formats, writers=None, workers=None,
+                  wait=True):
+	"""Write one profile to several formats concurrently
+	
+		:param coord_pairs: The n x 2 array of x and y coordinates.
+		:type coord_pairs: np.array
+		:param stem: The output file path without its extension. The 
+			extension of each format is taken from ``EXTENSIONS``.
+		:type stem: Pathlike, str
+		:param formats: The formats to write, see ``EXTENSIONS``.
+		:type formats: list
+		:param writers: Writers to use instead of the defaults, keyed by 
+			format. Each is called as ``writer(coord_pairs, fn)``.
+		:type writers: dict, None
+		:param workers: The number of threads. Default is one per format.
+		:type workers: int, None
+		:param wait: If True wait for every file and return the file of 
+			each format. If False return the futures immediately.
+		:type wait: bool
+		:return: The file written for each format, or the future of each 
+			format when ``wait`` is False.
+		:rtype: dict
+		:raises: ValueError if a format is unknown. When waiting, the 
+			first error raised by a writer.
+	"""
+	default_writers = {'scad': write_scad, 'csv': write_csv, 
+	                   'binary': write_npy, 'stl': write_stl, 
+	                   'png': write_png}
+	default_writers.update(writers or {})
+	unknown = [fmt for fmt in formats if fmt not in default_writers]
+	if unknown:
+		raise ValueError(f'Unknown export formats {unknown}. Choose from '
+		                 f'{sorted(default_writers)}')
+	
+	# One read-only copy shared by every writer, float32 stays float32
+	shared = np.array(coord_pairs, 
+	                  dtype=np.result_type(np.asarray(coord_pairs), 
+	                                       np.float32))
+	shared.flags.writeable = False
+	
+	stem = Path(stem)
+	stem.parent.mkdir(parents=True, exist_ok=True)
+	pool = ThreadPoolExecutor(max_workers=workers or len(formats) or 1)
+	futures = {}
+	for fmt in formats:
+		fn = stem.with_name(stem.name + EXTENSIONS.get(fmt, f'.{fmt}'))
+		futures[fmt] = pool.submit(_write, default_writers[fmt], shared, fn)
+	pool.shutdown(wait=wait)
+	if not wait:
+		return futures
+	return {fmt: future.result() for fmt, future in futures.items()}
+
+
+def _write(writer, coord_pairs, fn):
+	writer(coord_pairs, fn)
+	return fn
@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+
+"""
+Level of Detail
+
+Coarser versions of a profile derived from one high resolution build.
+
+Every point of the finest profile is ranked once by the Douglas-Peucker
+tolerance at which it would be removed. Any coarser profile is then the
+set of points ranked above a tolerance, or the highest ranked points
+within a point budget, so the levels are nested and cost a single mask to
+select. The number of segments around the axis of each level is chosen
+so the chord error of the revolved mesh is within the same tolerance.
+
+Douglas-Peucker does not preserve topology. When the wall is thin a
+coarse level can make the inner and outer surfaces cross. A tolerance
+level that crosses itself takes more of the highest ranked points, up to
+the points of the next finer level, until it is valid, which only lowers
+its error. A budget level can't take more points, so every level records
+whether it is a valid polygon and :meth:`LODChain.export` refuses to
+write invalid levels.
+
+
+Example:
+--------
+>>> nc.build_nosecone()
+>>> chain = nc.lod(tolerances=(0.01, 0.1, 1.0))
+>>> chain.levels[2]['n_points'], chain.levels[2]['max_error']
+>>> chain.levels[2]['valid']
+>>> tris = chain.mesh(2)
+>>> nc.export_lod(['scad', 'stl'], fn='nosecone')
+"""
+
+from pathlib import Path
+import numpy as np
+import shapely
+
+from exporters import (revolve_mesh, write_triangles, write_scad,
+                       export_coords)
+
+
+def segment_distance(pts, a, b):
+	"""Distance from each point to the segment(s) from a to b
+
+		The arguments are broadcast together, so for example points with
+		shape (n, 1, 2) and segments with shape (m, 2) give the n x m
+		distances of every point to every segment.
+
+		:param pts: The n x 2 points.
+		:type pts: np.array
+		:param a: The segment start point(s), 2 or n x 2.
+		:type a: np.array
+		:param b: The segment end point(s), 2 or n x 2.
+		:type b: np.array
+		:return: The distances, the broadcast shape without the last axis.
+		:rtype: np.array
+	"""
+	ab = b - a
+	ap = pts - a
+	denom = np.sum(ab*ab, axis=-1)
+	t = np.divide(np.sum(ap*ab, axis=-1), denom,
+	              out=np.zeros(np.broadcast(denom, ap[..., 0]).shape),
+	              where=denom > 0)
+	t = np.clip(t, 0, 1)[..., np.newaxis]
+	d = ap - t*ab
+	return np.hypot(d[..., 0], d[..., 1])
+
+
+def simplification_rank(coord_pairs):
+	"""Rank each point by the tolerance at which it is simplified away
+
+		A point is kept by Douglas-Peucker simplification with tolerance
+		``tol`` exactly when its rank is greater than ``tol``. The first
+		and last points are never removed and have an infinite rank.
+
+		:param coord_pairs: The n x 2 array of x and y coordinates.
+		:type coord_pairs: np.array
+		:return: The rank of every point.
+		:rtype: np.array
+	"""
+	pts = np.asarray(coord_pairs, dtype=float)
+	n = len(pts)
+	rank = np.zeros(n)
+	rank[[0, -1]] = np.inf
+	# Every interval at the same depth of the recursion is split at once
+	lo = np.array([0])
+	hi = np.array([n - 1])
+	parent = np.array([np.inf])
+	while lo.size:
+		inner = hi - lo - 1
+		split = inner > 0
+		lo, hi, parent, inner = lo[split], hi[split], parent[split], inner[split]
+		if not lo.size:
+			break
+		# Interior point indices of every interval, end to end
+		group = np.repeat(np.arange(lo.size), inner)
+		starts = np.cumsum(inner) - inner
+		idx = lo[group] + 1 + np.arange(group.size) - starts[group]
+		d = segment_distance(pts[idx], pts[lo[group]], pts[hi[group]])
+
+		dmax = np.maximum.reduceat(d, starts)
+		first = np.flatnonzero(d == dmax[group])
+		_, pick = np.unique(group[first], return_index=True)
+		k = idx[first[pick]]
+		# A point can't outlive the split that exposed it
+		r = np.minimum(dmax, parent)
+		rank[k] = r
+		lo, hi, parent = (np.concatenate((lo, k)), np.concatenate((k, hi)),
+		                  np.concatenate((r, r)))
+	return rank
+
+
+def max_error(coord_pairs, keep):
+	"""Largest distance from the full profile to a simplified one
+
+		:param coord_pairs: The n x 2 array of x and y coordinates.
+		:type coord_pairs: np.array
+		:param keep: Mask of the points kept by the simplified profile.
+			The first and last points must be kept.
+		:type keep: np.array
+		:rtype: float
+	"""
+	idx = np.flatnonzero(keep)
+	seg = np.searchsorted(idx, np.arange(len(coord_pairs)), side='right') - 1
+	seg = np.clip(seg, 0, len(idx) - 2)
+	d = segment_distance(coord_pairs, coord_pairs[idx[seg]],
+	                      coord_pairs[idx[seg + 1]])
+	return float(d.max())
+
+
+def is_valid_profile(coord_pairs):
+	"""Check that a closed profile is a valid polygon
+
+		:param coord_pairs: The n x 2 array of x and y coordinates.
+		:type coord_pairs: np.array
+		:return: False if the profile crosses itself or has fewer than
+			3 points.
+		:rtype: bool
+	"""
+	if len(coord_pairs) < 3:
+		return False
+	return bool(shapely.is_valid(shapely.polygons(coord_pairs)))
+
+
+def chord_segments(radius, tolerance, segments=200, min_segments=8):
+	"""Segments around the axis that keep the chord error within tolerance
+
+		:param radius: The largest radius of the profile.
+		:type radius: int, float
+		:param tolerance: The allowed chord error.
+		:type tolerance: int, float
+		:param segments: The upper limit, used by the finest level.
+		:type segments: int
+		:param min_segments: The lower limit.
+		:type min_segments: int
+		:rtype: int
+	"""
+	if tolerance <= 0 or radius <= 0:
+		return segments
+	c = 1 - min(tolerance/radius, 1)
+	if c >= 1:
+		# The tolerance is below the float precision of the radius
+		return segments
+	n = int(np.ceil(np.pi/np.arccos(c))) if c > -1 else min_segments
+	return int(np.clip(n, min_segments, segments))
+
+
+class LODChain:
+	"""Level-of-detail chain of one profile
+
+		Level 0 is the full profile. Each further level is coarser.
+		Selected profiles and revolved meshes are cached, so moving
+		between levels only costs the first time a level is used. Each
+		level is a dict of its 'coord_pairs', 'n_points', 'tolerance',
+		'max_error', 'valid' and 'segments'.
+
+		:param coord_pairs: The n x 2 array of x and y coordinates of the
+			finest profile.
+		:type coord_pairs: np.array
+		:param tolerances: The largest allowed deviation from the finest
+			profile of each coarser level, mm.
+		:type tolerances: list, tuple
+		:param budgets: The largest number of points of each coarser
+			level. Used instead of ``tolerances`` when given.
+		:type budgets: list, tuple, None
+		:param segments: The number of segments around the axis of the
+			finest level.
+		:type segments: int
+	"""
+	def __init__(self, coord_pairs, tolerances=(0.01, 0.1, 1.0),
+	             budgets=None, segments=200):
+		self.coord_pairs = np.array(coord_pairs, dtype=float)
+		self.coord_pairs.flags.writeable = False
+		self.segments = segments
+		self.rank = simplification_rank(self.coord_pairs)
+		self.radius = float(np.max(np.abs(self.coord_pairs[:, 1])))
+		self._meshes = {}
+
+		keep = np.ones(len(self.coord_pairs), dtype=bool)
+		self.levels = [self._level(keep, 0.0)]
+		if budgets is not None:
+			for budget in budgets:
+				self.levels.append(self._level(self._budget_mask(budget)))
+		else:
+			for tol in tolerances:
+				self.levels.append(self._level(self._valid_mask(tol), tol))
+
+	def __repr__(self):
+		return (f"LODChain(points={[lv['n_points'] for lv in self.levels]}, "
+		        f"segments={[lv['segments'] for lv in self.levels]})")
+
+	def __len__(self):
+		return len(self.levels)
+
+	def _budget_mask(self, budget):
+		budget = max(int(budget), 2)
+		keep = np.zeros(len(self.rank), dtype=bool)
+		keep[np.argsort(-self.rank, kind='stable')[:budget]] = True
+		return keep
+
+	def _valid_mask(self, tolerance):
+		"""Points ranked above the tolerance, plus the next highest ranked
+			points if needed to keep the profile from crossing itself
+		"""
+		order = np.argsort(-self.rank, kind='stable')
+		m = int(np.sum(self.rank > tolerance))
+		limit = self.levels[-1]['n_points']
+		step = 1
+		while (m < limit and not 
+		       is_valid_profile(self.coord_pairs[np.sort(order[:m])])):
+			m = min(m + step, limit)
+			step *= 2
+		keep = np.zeros(len(self.rank), dtype=bool)
+		keep[order[:m]] = True
+		return keep
+
+	def _level(self, keep, tolerance=None):
+		coords = self.coord_pairs[keep]
+		coords.flags.writeable = False
+		err = max_error(self.coord_pairs, keep) if not keep.all() else 0.0
+		if tolerance is None:
+			tolerance = err
+		return {'coord_pairs': coords, 'n_points': len(coords),
+		        'tolerance': tolerance, 'max_error': err,
+		        'valid': is_valid_profile(coords),
+		        'segments': chord_segments(self.radius, tolerance,
+		                                   self.segments)}
+
+	def select(self, tolerance=None, budget=None):
+		"""Return a profile for any tolerance or point budget
+
+			:param tolerance: The largest allowed deviation, mm.
+			:type tolerance: int, float, None
+			:param budget: The largest number of points.
+			:type budget: int, None
+			:return: The coordinates of the selected profile.
+			:rtype: np.array
+		"""
+		if budget is not None:
+			return self.coord_pairs[self._budget_mask(budget)]
+		return self.coord_pairs[self.rank > (tolerance or 0)]
+
+	def coords(self, level):
+		"""The coordinates of a level"""
+		return self.levels[level]['coord_pairs']
+
+	def mesh(self, level):
+		"""The revolved triangle mesh of a level
+
+			:return: The triangle vertices and unit normals.
+			:rtype: tuple
+		"""
+		if level not in self._meshes:
+			self._meshes[level] = revolve_mesh(
+				self.coords(level), segments=self.levels[level]['segments'],
+				normals=True)
+		return self._meshes[level]
+
+	def export(self, stem, formats, writers=None, workers=None,
+	           skip_invalid=False):
+		"""Write every level to several formats
+
+			Level ``i`` is written to ``<stem>_lod<i>.<ext>``. The STL of
+			each level is written from its cached mesh and the SCAD file
+			uses the segment count of the level.
+
+			:param stem: The output file path without its extension.
+			:type stem: Pathlike, str
+			:param formats: See :func:`exporters.export_coords`.
+			:type formats: list
+			:param writers: Writers to use instead of the defaults, keyed
+				by format. The 'scad' writer also receives ``segments``.
+			:type writers: dict, None
+			:param workers: The number of threads.
+			:type workers: int, None
+			:param skip_invalid: Skip the levels that are not valid
+				polygons instead of raising.
+			:type skip_invalid: bool
+			:return: The files written for each level, None for a skipped
+				level.
+			:rtype: list
+			:raises: ValueError if a level is not a valid polygon and
+				``skip_invalid`` is False.
+		"""
+		invalid = [i for i, level in enumerate(self.levels)
+		           if not level['valid']]
+		if invalid and not skip_invalid:
+			raise ValueError(f'Level(s) {invalid} cross themselves. Use a '
+			                 f'smaller tolerance or a larger budget, or '
+			                 f'skip_invalid=True.')
+		stem = Path(stem)
+		writers = dict(writers or {})
+		files = []
+		for i, level in enumerate(self.levels):
+			if not level['valid']:
+				files.append(None)
+				continue
+			seg = level['segments']
+			scad = writers.get('scad', write_scad)
+			level_writers = dict(writers)
+			level_writers['scad'] = (
+				lambda xy, fn, scad=scad, seg=seg: scad(xy, fn, segments=seg))
+			level_writers['stl'] = (
+				lambda xy, fn, i=i: write_triangles(*self.mesh(i), fn=fn))
+			files.append(export_coords(
+				level['coord_pairs'], stem.with_name(f'{stem.name}_lod{i}'),
+				formats, writers=level_writers, workers=workers))
+		return files
@@ -0,0 +1,369 @@
+#!/usr/bin/env python3
+
+"""
+Nose Shapes
+
+Vectorized kernels for the nose cone shape families. Each shape takes an
+array of x-coordinates measured from the tip (x = 0) to the base
+(x = length) and returns the radius at every point in a single array
+operation. Each shape also knows where a spherical nose cap of radius
+``rn`` is tangent to it, in closed form where one exists.
+
+The shapes are kept in the ``SHAPES`` registry so a shape can be selected
+by name, for example ``Nosecone(..., shape='parabolic', alpha=0.5)``. The
+shape parameters may be NumPy arrays, in which case they are broadcast
+against the x-coordinates to evaluate a whole sweep at once, and the
+tangency of a nose cap is found for every value of the sweep.
+
+See the equations in ``SolidWorks/SWEquationsExported`` and the
+``OpenSCAD/NoseCones`` generators for the source of each equation.
+
+
+Shapes:
+-------
+conic			y = R*x/L
+biconic			Two cones joined at (L1, R1)
+tangent_ogive	y = sqrt(rho^2 - (L - x)^2) + R - rho
+elliptical		y = R*sqrt(1 - ((L - x)/L)^2)
+parabolic		y = R*(2*(x/L) - K*(x/L)^2)/(2 - K), alpha = K
+power_series	y = R*(x/L)^n, alpha = n
+haack			y = R*sqrt(theta - sin(2*theta)/2 + C*sin(theta)^3)/sqrt(pi),
+				theta = arccos(1 - 2*x/L), alpha = C
+
+
+Example:
+--------
+>>> shape = nose_shape('parabolic', 160, 20, alpha=np.array([0.25, 0.5, 1]))
+>>> xt, yt, x0, xa = shape.tangency(2)
+
+A power series with n < 0.5 is blunt at the tip, where the radius of a
+tangent cap is infinite. The cap radius falls to a minimum aft of the
+tip before it rises again, and the cap is tangent where it rises::
+
+	>>> nose_shape('power_series', 264, 33, alpha=0.3).tangency(15)
+	(17.18..., 14.54..., 20.87..., 5.87...)
+"""
+
+import numpy as np
+
+
+SHAPES = {}
+
+
+def register_shape(name):
+	"""Class decorator adding a nose shape to ``SHAPES``
+
+		:param name: The name the shape is selected by.
+		:type name: str
+	"""
+	def _register(cls):
+		cls.name = name
+		SHAPES[name] = cls
+		return cls
+	return _register
+
+
+def nose_shape(name, length, base_radius, alpha=None, **kwargs):
+	"""Create a nose shape from the registry
+
+		:param name: The name of the shape. See ``SHAPES``.
+		:type name: str
+		:param length: The length of the nose cone (excluding the shoulder).
+		:type length: int, float
+		:param base_radius: The radius of the nose cone base.
+		:type base_radius: int, float
+		:param alpha: The shape parameter of shapes that have one (K for
+			parabolic, n for power series, C for Haack). The shape default
+			is used if None.
+		:type alpha: None, int, float, np.array
+		:param kwargs: Any other parameters of the shape, for example
+			``L1`` and ``R1`` for the biconic shape.
+		:type kwargs: dict
+		:raises: ValueError if the shape is not in the registry.
+	"""
+	try:
+		cls = SHAPES[name]
+	except KeyError:
+		raise ValueError(f'Unknown nose shape "{name}". Choose one of '
+		                 f'{sorted(SHAPES)}') from None
+	if alpha is not None and cls.alpha_param is not None:
+		kwargs.setdefault(cls.alpha_param, alpha)
+	return cls(length=length, base_radius=base_radius, **kwargs)
+
+
+class NoseShape:
+	"""Base class of the nose shape kernels
+
+		:param length: The length of the nose cone (excluding the shoulder).
+		:type length: int, float
+		:param base_radius: The radius of the nose cone base.
+		:type base_radius: int, float
+	"""
+	name = None
+	alpha_param = None
+
+	def __init__(self, length, base_radius):
+		self.length = length
+		self.base_radius = base_radius
+
+	def __repr__(self):
+		return (f"{type(self).__name__}(length={self.length}, "
+		        f"base_radius={self.base_radius})")
+
+	def radius(self, x):
+		"""Return the radius at each x-coordinate
+
+			:param x: The x-coordinates, 0 <= x <= length.
+			:type x: np.array
+			:rtype: np.array
+		"""
+		raise NotImplementedError
+
+	def slope(self, x):
+		"""Return dy/dx at each x-coordinate
+
+			:param x: The x-coordinates, 0 < x <= length.
+			:type x: np.array
+			:rtype: np.array
+		"""
+		raise NotImplementedError
+
+	def tangency(self, rn):
+		"""Calculate where a spherical nose cap is tangent to the shape
+
+			The cap is centered on the X-axis, so at the point of tangency
+			the normal of the shape passes through the cap center and
+			``rn = y*sqrt(1 + y'^2)``. This base version finds that point
+			numerically, with one bracket and bisection for every value of
+			array shape parameters. The bracket is where the cap radius
+			rises through rn after its smallest value, since for some
+			shapes it falls from the tip first. Shapes with a closed form
+			solution override it.
+
+			:param rn: radius of the nose sphere
+			:type rn: int, float, np.array
+			:return: The x and y-coordinates of the point of tangency, the
+				x-coordinate of the center of the nose sphere and the apex
+				point, (xt, yt, x0, xa). Arrays with the broadcast shape of
+				rn and the shape parameters if any of them is an array.
+			:rtype: tuple
+			:raises: ValueError if no sphere of radius rn is tangent to the
+				shape.
+		"""
+		rn = np.asarray(rn, dtype=float)
+		shape = np.broadcast_shapes(
+			np.shape(self.radius(np.asarray(self.length, dtype=float))),
+			rn.shape)
+		if not np.any(rn):
+			zero = np.zeros(shape)[()]
+			return zero, zero, zero, zero
+		# Sample densely near the tip where the tangency usually is, one
+		# column of samples for every parameter value
+		grid = np.linspace(0, 1, 4097)[1:]**2
+		x = np.broadcast_to(self.length*grid.reshape((-1,) + (1,)*len(shape)),
+		                    grid.shape + shape)
+		g = np.broadcast_to(self._cap_radius(x), x.shape)
+		# g may fall from the tip before it rises, for example a power 
+		# series with n < 0.5. The cap is tangent where g rises through 
+		# rn, after its smallest value.
+		g = np.where(np.isnan(g), np.inf, g)
+		first = np.argmin(g, axis=0)[np.newaxis]
+		samples = np.arange(len(grid)).reshape((-1,) + (1,)*len(shape))
+		rising = (g >= rn) & (samples >= first)
+		i = np.argmax(rising, axis=0)[np.newaxis]
+		blunt = rn != 0
+		too_small = blunt & (rn < np.take_along_axis(g, first, axis=0)[0])
+		if np.any(too_small):
+			raise ValueError(f'Tip radius {rn} is too small for the '
+			                 f'{self.name} shape{self._where(too_small)}.')
+		too_large = blunt & ~np.any(rising, axis=0)
+		if np.any(too_large):
+			raise ValueError(f'Tip radius {rn} is too large for the '
+			                 f'{self.name} shape{self._where(too_large)}.')
+		lo = np.take_along_axis(x, np.where(i > first, i - 1, i), axis=0)[0]
+		hi = np.take_along_axis(x, i, axis=0)[0]
+		for _ in range(60):
+			mid = (lo + hi)/2
+			below = self._cap_radius(mid) < rn
+			lo = np.where(below, mid, lo)
+			hi = np.where(below, hi, mid)
+		xt = np.where(blunt, (lo + hi)/2, 0)
+		yt = np.where(blunt, self.radius(xt), 0)
+		x0 = np.where(blunt, xt + yt*self.slope(np.where(blunt, xt, 1)), 0)
+		return xt[()], yt[()], x0[()], (x0 - rn)[()]
+
+	def _cap_radius(self, x):
+		"""Radius of the nose sphere tangent to the shape at x"""
+		return self.radius(x)*np.sqrt(1 + self.slope(x)**2)
+
+	def _where(self, bad):
+		"""Describe which values of array shape parameters fail"""
+		if np.ndim(bad) == 0:
+			return ''
+		return f' at index {tuple(int(j) for j in np.argwhere(bad)[0])}'
+
+
+def _conic_tangency(L, R, rn):
+	"""Closed form tangency of a sphere with a cone of length L and base
+		radius R
+	"""
+	xt = (L**2/R)*np.sqrt(rn**2/(R**2 + L**2))
+	yt = xt*R/L
+	x0 = xt + np.sqrt(rn**2 - yt**2)
+	return xt, yt, x0, x0 - rn
+
+
+@register_shape('conic')
+class Conic(NoseShape):
+	"""Conic nose cone"""
+	def radius(self, x):
+		return x*(self.base_radius/self.length)
+
+	def slope(self, x):
+		return np.full_like(x, self.base_radius/self.length, dtype=float)
+
+	def tangency(self, rn):
+		return _conic_tangency(self.length, self.base_radius, rn)
+
+
+@register_shape('biconic')
+class Biconic(NoseShape):
+	"""Bi-conic nose cone
+
+		:param L1: The length of the fore cone.
+		:type L1: int, float
+		:param R1: The radius at the base of the fore cone.
+		:type R1: int, float
+	"""
+	def __init__(self, length, base_radius, L1, R1):
+		super().__init__(length, base_radius)
+		self.L1 = L1
+		self.R1 = R1
+
+	def radius(self, x):
+		fore = x*(self.R1/self.L1)
+		aft = (self.R1 + (x - self.L1)*(self.base_radius - self.R1) /
+		       (self.length - self.L1))
+		return np.where(x <= self.L1, fore, aft)
+
+	def slope(self, x):
+		return np.where(x <= self.L1, self.R1/self.L1,
+		                (self.base_radius - self.R1)/(self.length - self.L1))
+
+	def tangency(self, rn):
+		fore = _conic_tangency(self.L1, self.R1, rn)
+		on_fore = fore[0] <= self.L1
+		if np.all(on_fore):
+			return fore
+		aft = super().tangency(rn)
+		return tuple(np.where(on_fore, f, a)[()] for f, a in zip(fore, aft))
+
+
+@register_shape('tangent_ogive')
+class TangentOgive(NoseShape):
+	"""Tangent ogive nose cone"""
+	def __init__(self, length, base_radius):
+		super().__init__(length, base_radius)
+		self.rho = (base_radius**2 + length**2)/(2*base_radius)
+
+	def radius(self, x):
+		return (np.sqrt(self.rho**2 - (self.length - x)**2) +
+		        self.base_radius - self.rho)
+
+	def slope(self, x):
+		dx = self.length - x
+		return dx/np.sqrt(self.rho**2 - dx**2)
+
+	def tangency(self, rn):
+		rho = self.rho
+		R = self.base_radius
+		x0 = self.length - np.sqrt((rho - rn)**2 - (rho - R)**2)
+		yt = rn*(rho - R)/(rho - rn)
+		xt = x0 - np.sqrt(rn**2 - yt**2)
+		return xt, yt, x0, x0 - rn
+
+
+@register_shape('elliptical')
+class Elliptical(NoseShape):
+	"""Elliptical nose cone"""
+	def radius(self, x):
+		s = (self.length - x)/self.length
+		return self.base_radius*np.sqrt(np.clip(1 - s**2, 0, None))
+
+	def slope(self, x):
+		s = (self.length - x)/self.length
+		return self.base_radius*s/(self.length*np.sqrt(1 - s**2))
+
+
+@register_shape('parabolic')
+class Parabolic(NoseShape):
+	"""Parabolic series nose cone
+
+		:param K: The parabolic shape parameter, 0 <= K <= 1. K = 0 is a
+			cone and K = 1 is a full parabola tangent to the body.
+		:type K: int, float, np.array
+	"""
+	alpha_param = 'K'
+
+	def __init__(self, length, base_radius, K=1):
+		super().__init__(length, base_radius)
+		self.K = K
+
+	def radius(self, x):
+		u = x/self.length
+		return self.base_radius*(2*u - self.K*u**2)/(2 - self.K)
+
+	def slope(self, x):
+		u = x/self.length
+		return 2*self.base_radius*(1 - self.K*u)/(self.length*(2 - self.K))
+
+
+@register_shape('power_series')
+class PowerSeries(NoseShape):
+	"""Power series nose cone
+
+		:param n: The power, 0 < n <= 1. n = 0.5 is a parabola and n = 1
+			is a cone.
+		:type n: int, float, np.array
+	"""
+	alpha_param = 'n'
+
+	def __init__(self, length, base_radius, n=0.5):
+		super().__init__(length, base_radius)
+		self.n = n
+
+	def radius(self, x):
+		return self.base_radius*(x/self.length)**self.n
+
+	def slope(self, x):
+		return (self.base_radius*self.n*(x/self.length)**(self.n - 1) /
+		        self.length)
+
+
+@register_shape('haack')
+class Haack(NoseShape):
+	"""Haack series nose cone
+
+		:param C: The Haack shape parameter. C = 0 is the LD-Haack (Von
+			Karman) and C = 1/3 is the LV-Haack.
+		:type C: int, float, np.array
+	"""
+	alpha_param = 'C'
+
+	def __init__(self, length, base_radius, C=0):
+		super().__init__(length, base_radius)
+		self.C = C
+
+	def _theta(self, x):
+		return np.arccos(np.clip(1 - 2*x/self.length, -1, 1))
+
+	def radius(self, x):
+		theta = self._theta(x)
+		f = theta - np.sin(2*theta)/2 + self.C*np.sin(theta)**3
+		return self.base_radius*np.sqrt(f)/np.sqrt(np.pi)
+
+	def slope(self, x):
+		theta = self._theta(x)
+		f = theta - np.sin(2*theta)/2 + self.C*np.sin(theta)**3
+		return (self.base_radius*np.sin(theta)*(2 + 3*self.C*np.cos(theta)) /
+		        (self.length*np.sqrt(np.pi)*np.sqrt(f)))
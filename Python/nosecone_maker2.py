@@ -69,10 +69,12 @@ Notes:
   * Y-axis: The axis extending perpendicular to the X-axis and parallel 
             with the plane of the bottom of the shoulder. 
   * Z-axis: Z-axis and Y-axis are effectively the same.
-* Currently only ``alpha = 1`` is supported. This should produce an ogive 
-  nosecone.
-* Change the value of ``ar`` to achieve different types of ogive. For example 
-  ``ar = 4`` is a 4:1 ogive.
+* The nose shape is selected with ``shape`` (default ``'tangent_ogive'``) 
+  and its parameter with ``alpha``. See ``nose_shapes.py`` for the 
+  available shapes. The test output was made with ``shape='parabolic'`` 
+  and ``alpha = 1``.
+* Change the value of ``ar`` to achieve different fineness ratios. For 
+  example ``ar = 4`` is a 4:1 nosecone.
 * The output file will contain several hundred lines of coordinate points, 
   depending on the overall length of the nosecone and the value of 
   ``dgamma``. 
@@ -115,9 +117,152 @@ from shapely.ops import polygonize
 import matplotlib.pyplot as plt
 from pathlib import Path
 from shapely import *
+import shapely
 import numpy as np
 import os
 
+from exporters import write_scad, write_csv, export_coords, output_path
+from nose_shapes import nose_shape
+from lod import LODChain
+from precision import precision_policy
+
+
+def _nearest_alive(alive):
+	"""Index of the nearest True entry at or before, and at or after, each 
+		position of the last axis. -1 and n where there is none.
+	"""
+	n = alive.shape[-1]
+	idx = np.arange(n)
+	before = np.maximum.accumulate(np.where(alive, idx, -1), axis=-1)
+	after = np.flip(np.minimum.accumulate(
+		np.flip(np.where(alive, idx, n), axis=-1), axis=-1), axis=-1)
+	return before, after
+
+
+def _gather(a, idx):
+	"""Take rows ``idx`` (..., m) from ``a`` (..., n, 2)"""
+	return np.take_along_axis(a, idx[..., np.newaxis], axis=-2)
+
+
+def _mitre_offset(xy, k):
+	"""Offset a polyline to its right-hand side with mitred corners
+	
+		Every segment is moved parallel to itself by ``k`` and each vertex 
+		is where the offset lines of its two segments meet. The ends are 
+		cut square to the first and last segments. A negative ``k`` 
+		offsets to the left-hand side.
+		
+		Zero-length segments are ignored. An offset segment that comes 
+		out reversed, because its neighbours cross before it begins, is 
+		trimmed away and its neighbours are joined directly, the same as 
+		Shapely's ``offset_curve``. Segments are trimmed one at a time in 
+		the order they collapse as the offset grows. A trimmed segment 
+		leaves a repeated point so every polyline of a batch keeps the 
+		same shape.
+	
+		:param xy: The polyline coordinates with shape (..., n, 2). Any 
+			leading axes are treated as a batch of polylines.
+		:type xy: np.array
+		:param k: The offset distance. Broadcast against the leading axes 
+			of ``xy``.
+		:type k: int, float, np.array
+		:return: The offset polyline with the same shape as ``xy``.
+		:rtype: np.array
+		:raises: ValueError if a polyline has no segment of non-zero 
+			length.
+	"""
+	xy = np.asarray(xy, dtype=float)
+	k = np.asarray(k, dtype=float)[..., np.newaxis, np.newaxis]
+	xy, k = np.broadcast_arrays(xy, k)
+	k = k[..., :1, :1]
+	n = xy.shape[-2]
+	tol = 1e-12*max(np.max(np.abs(xy)), 1)
+	
+	d = np.diff(xy, axis=-2)
+	length = np.linalg.norm(d, axis=-1)
+	alive = length > tol
+	if not alive.any(axis=-1).all():
+		raise ValueError('Can not offset a polyline of zero length.')
+	# Zero-length segments borrow the direction of a neighbour for the 
+	# end caps, they never become offset lines themselves
+	before, after = _nearest_alive(alive)
+	fill = np.where(before >= 0, before, after)
+	u = _gather(d/np.where(alive, length, 1)[..., np.newaxis], fill)
+	normals = np.stack((u[..., 1], -u[..., 0]), axis=-1)
+	
+	# The lines the vertices are made of: the start cap, the offset 
+	# segments and the end cap, each as a point and a direction
+	def lines(dist):
+		return np.concatenate((xy[..., :1, :], xy[..., :-1, :] + 
+		                       dist*normals, xy[..., -1:, :]), axis=-2)
+	dirs = np.concatenate((normals[..., :1, :], u, normals[..., -1:, :]),
+	                      axis=-2)
+	cap = np.ones(alive.shape[:-1] + (1,), dtype=bool)
+	alive = np.concatenate((cap, alive, cap), axis=-1)
+	
+	def vertices(points, left, right):
+		# Vertex i joins line ``left`` and line ``right``
+		p1, d1 = _gather(points, left), _gather(dirs, left)
+		p2, d2 = _gather(points, right), _gather(dirs, right)
+		cross = d1[..., 0]*d2[..., 1] - d1[..., 1]*d2[..., 0]
+		w = p2 - p1
+		parallel = np.abs(cross) < 1e-12
+		t = np.where(parallel, np.sum((xy - p1)*d1, axis=-1),
+		             (w[..., 0]*d2[..., 1] - w[..., 1]*d2[..., 0]) / 
+		             np.where(parallel, 1, cross))
+		return p1 + t[..., np.newaxis]*d1
+	
+	start = lines(0)
+	points = lines(k)
+	for _ in range(n):
+		# Vertex i joins the nearest live line at or before line i and 
+		# the nearest at or after line i + 1
+		before, after = _nearest_alive(alive)
+		left = before[..., :-1]
+		right = after[..., 1:]
+		offset = vertices(points, left, right)
+		
+		# The length of each offset segment changes linearly with the 
+		# offset distance. Trim the reversed segment that collapses to a 
+		# point first, then join its neighbours.
+		run = np.sum(np.diff(offset, axis=-2)*u, axis=-1)
+		run0 = np.sum(np.diff(vertices(start, left, right), axis=-2)*u,
+		              axis=-1)
+		collapses = alive[..., 1:-1] & (run < -tol)
+		if not collapses.any():
+			break
+		when = np.where(collapses, np.clip(run0, 0, None) / 
+		                np.where(collapses, run0 - run, 1), np.inf)
+		first = np.argmin(when, axis=-1)[..., np.newaxis]
+		kill = np.zeros_like(alive)
+		np.put_along_axis(kill, first + 1, 
+		                  np.take_along_axis(collapses, first, axis=-1), 
+		                  axis=-1)
+		alive &= ~kill
+	return offset
+
+
+def _plot_xy(xx, yy, fn=None):
+	"""Plot a cross section
+	
+		:param xx: The x-coords to plot.
+		:type xx: np.array
+		:param yy: The y-coords to plot.
+		:type yy: np.array
+		:param fn: The filename to save the plot to.
+		:type fn: None, Pathlike, str
+	"""
+	fig = plt.figure(figsize=(13,6), dpi=150)
+	ax = fig.add_subplot(111)
+	ax.grid()
+	ax.plot(xx, yy, color='g')
+	ax.set_aspect('equal')
+	
+	if fn is not None:
+		fig.savefig(fn)
+	plt.show()
+	return fig
+
 
 class Nosecone:
 	"""Nosecone plotter object
@@ -140,6 +285,16 @@ class Nosecone:
 		:type shoulder_length: int, float
 		:param ar: The aspect ratio of the nosecone. 
 		:type ar: int, float
+		:param kwargs: Optional settings. ``res`` is the plot resolution 
+			(default 1000). ``shape`` is the name of the nose shape in 
+			``nose_shapes.SHAPES`` (default 'tangent_ogive'). ``alpha`` is 
+			the shape parameter of shapes that have one, see 
+			:func:`nose_shapes.nose_shape`. ``shape_params`` is a dict of 
+			any other shape parameters, for example ``L1`` and ``R1`` of 
+			the biconic shape. ``precision`` is the storage precision of 
+			``coord_pairs``, a ``precision.PrecisionPolicy`` or the name 
+			of one (default 'float64').
+		:type kwargs: dict
 	"""
 	def __init__(self, base_radius, tip_radius, k, shoulder_radius,
 	             shoulder_length, ar, **kwargs):
@@ -161,12 +316,19 @@ class Nosecone:
 		                     (2*self.base_radius))
 
 		self.xy = np.array([])
+		self._nose_xy = np.empty((0, 2))
 		self._xnose = np.array([])
 		self._ynose = np.array([])
 		self.coord_pairs = np.array([])
 		
 		self.res = kwargs.get('res', 1000)
-		self.alpha = kwargs.get('alpha', 1)
+		self.alpha = kwargs.get('alpha', None)
+		self.shape = kwargs.get('shape', 'tangent_ogive')
+		self.profile = nose_shape(self.shape, length=self.ogive_length,
+		                          base_radius=self.base_radius,
+		                          alpha=self.alpha,
+		                          **kwargs.get('shape_params', {}))
+		self.precision = precision_policy(kwargs.get('precision'))
 		
 		self._xa = 0  # Apex point
 		self._xt = 0  # X-coord of tangency
@@ -175,12 +337,13 @@ class Nosecone:
 		
 		self._outer_surface = LineString()
 		self._inner_surface = LineString()
+		self._lod = {}
 	
 	def __repr__(self):
 		r = (f"Nosecone(base_radius={self.base_radius}, tip_radius="
 		     f"{self.tip_radius}, k={self.k}, shoulder_radius="
 			 f"{self.shoulder_radius}, shoulder_length="
-			 "{self.shoulder_length}, ar={self.ar})")
+			 f"{self.shoulder_length}, ar={self.ar}, shape='{self.shape}')")
 		return r
 
 	# @property
@@ -203,6 +366,26 @@ class Nosecone:
 	def has_outer_surface(self):
 		return not self._outer_surface.is_empty
 
+	@property
+	def outer_coords(self):
+		"""The n x 2 coordinates of the outer surface, empty until 
+			:meth:`add_shoulder` is run
+		"""
+		if not self.has_outer_surface:
+			return np.empty((0, 2))
+		return np.asarray(self._outer_surface.coords)[:, :2]
+
+	@property
+	def inner_coords(self):
+		"""The n x 2 coordinates of the inner surface above the X-axis, 
+			as used in ``coord_pairs``. Empty until :meth:`inner_surface` 
+			is run or if ``k`` is 0.
+		"""
+		if not self.has_inner_surface:
+			return np.empty((0, 2))
+		inner = np.asarray(self._inner_surface.coords)[:, :2]
+		return inner[inner[:, 1] >= 0]
+
 	@property
 	def ls_coords(self):
 		"""Returns the pairs of X and Y coordinates for the LineStrings
@@ -230,35 +413,38 @@ class Nosecone:
 		pairs = [out_xx, out_yy, in_xx, in_yy]
 		return pairs
 
-	def _blunt_tangent_ogive(self):
-		"""Calculate the values of x0, xt, yt, and xa"""
-		gamma_s = self.shoulder_length
-		gamma = self.ogive_length
-		beta_s = self.shoulder_radius
-		beta = self.base_radius
-		rn = self.tip_radius
-		rho = self.ogive_radius
+	def _blunt_tip(self):
+		"""Calculate the values of x0, xt, yt, and xa
 		
-		self._x0 = gamma - np.sqrt((rho - rn)**2 - (rho - beta)**2)
-		self._yt = rn*(rho - beta)/(rho - rn)
-		self._xt = self._x0 - np.sqrt(rn**2 - self._yt**2)
-		self._xa = self._x0 - rn
+			:raises: ValueError if the tip radius doesn't fit the nose 
+				shape.
+		"""
+		with np.errstate(invalid='ignore'):
+			xt, yt, x0, xa = self.profile.tangency(self.tip_radius)
+		if not (np.isfinite([xt, yt, x0, xa]).all() and 
+		        0 <= xt <= self.ogive_length):
+			raise ValueError(f'Tip radius {self.tip_radius} is too large '
+			                 f'for the {self.shape} shape.')
+		self._xt, self._yt, self._x0, self._xa = xt, yt, x0, xa
 		return None
 	
 	def _nose_arc(self):
 		"""Generate the spherical nose cap arc"""
+		if self.tip_radius == 0:
+			# Sharp tip, the profile starts at the origin
+			self._xnose = np.zeros(1)
+			self._ynose = np.zeros(1)
+			return None
+		
 		theta0 = 0  # radians
 		theta_t = (np.arctan(self._yt / (self._x0 - self._xt)))  # radians
 		theta = np.linspace(theta0, theta_t, self.res)  # radians
 		
-		# rn = self.tip_radius
-		xnose = -self.tip_radius * np.cos(theta) + self._x0
-		ynose = self.tip_radius * np.sin(theta)
-
-		xnose = xnose[xnose<=self._xt]
-		ynose = ynose[ynose<=self._yt]
-		self._xnose = np.append(xnose, self._xt)
-		self._ynose = np.append(ynose, self._yt)
+		self._xnose = -self.tip_radius * np.cos(theta) + self._x0
+		self._ynose = self.tip_radius * np.sin(theta)
+		# The arc finishes exactly on the point of tangency
+		self._xnose[-1] = self._xt
+		self._ynose[-1] = self._yt
 		return None
 	
 	def _straight_points(self):
@@ -276,39 +462,49 @@ class Nosecone:
 			                 f'{gamma}, beta={beta}')
 		return None
 
-	def tangent_ogive(self):
-		"""Create a tangent ogive nose cone"""
-		gamma = self.ogive_length
-		beta = self.base_radius
-		rho = self.ogive_radius
-		x_coord = np.array([])
-		y_coord = np.array([])
+	def nose_profile(self):
+		"""Create the outer surface of the nose cone
 		
-		self._blunt_tangent_ogive()
-		for i in np.arange(0, gamma, gamma/self.res):
-			# x = i
-			y = np.sqrt(rho**2 - (gamma-i)**2) + beta - rho
-			x_coord = np.append(x_coord, i)
-			y_coord = np.append(y_coord, y)
-
+			The shape is evaluated by the ``self.profile`` kernel at 
+			``res + 1`` evenly spaced points from the tip to the base, aft 
+			of the spherical nose cap.
+		"""
+		self._blunt_tip()
 		self._nose_arc()
-		x_coord = x_coord[x_coord>=self._xt]
-		y_coord = y_coord[y_coord>=self._yt]
-
-		x_coord = np.append(self._xnose, x_coord)
-		y_coord = np.append(self._ynose, y_coord)
-		self._xy = np.array([x_coord, y_coord]).T
+		x = np.arange(self.res + 1) * (self.ogive_length / self.res)
+		x = x[x > self._xnose[-1]]
+		y = self.profile.radius(x)
+		
+		self._xy = np.empty((self._xnose.size + x.size, 2))
+		self._xy[:self._xnose.size, 0] = self._xnose
+		self._xy[:self._xnose.size, 1] = self._ynose
+		self._xy[self._xnose.size:, 0] = x
+		self._xy[self._xnose.size:, 1] = y
+		self._nose_xy = self._xy
 		return None
 
+	def tangent_ogive(self):
+		"""Create the outer surface of the nose cone
+		
+			Kept for existing scripts, see :meth:`nose_profile`.
+		"""
+		return self.nose_profile()
+
 	def add_shoulder(self):
-		"""Add a shoulder to the nose cone"""
+		"""Add a shoulder to the nose cone
+		
+			The shoulder is added to the profile of the last 
+			:meth:`nose_profile`, so it can be run again after changing 
+			``shoulder_radius``, ``shoulder_length`` or ``k``.
+		"""
 		gamma_s = self.shoulder_length
 		beta_s = self.shoulder_radius
+		nose_xy = self._nose_xy
 		
-		sldr_stop_x0_y0 = np.array([[self._xy[-1, 0], self._xy[-1, 1]]])
-		sldr_stop_x1_y1 = np.array([[self._xy[-1, 0], beta_s]])
-		sldr_end_x2_y2 = np.array([[self._xy[-1, 0] + gamma_s, beta_s]])
-		xy = np.concatenate((self._xy, sldr_stop_x0_y0, sldr_stop_x1_y1,
+		sldr_stop_x0_y0 = np.array([[nose_xy[-1, 0], nose_xy[-1, 1]]])
+		sldr_stop_x1_y1 = np.array([[nose_xy[-1, 0], beta_s]])
+		sldr_end_x2_y2 = np.array([[nose_xy[-1, 0] + gamma_s, beta_s]])
+		xy = np.concatenate((nose_xy, sldr_stop_x0_y0, sldr_stop_x1_y1,
 		                     sldr_end_x2_y2), axis=0)
 		
 		if self.k == 0:
@@ -333,9 +529,14 @@ class Nosecone:
 	def inner_surface(self):
 		"""Create the interior surface of the nose cone"""
 		if self.k == 0:
+			self._inner_surface = LineString()
 			return None
-		self._inner_surface = self._outer_surface.offset_curve(
-			distance=self.k, quad_segs=16, join_style=2)
+		# A negative distance offsets to the right-hand side, into the
+		# nosecone. Reversed to match the order of the old
+		# parallel_offset(side='right'), see tests/NoseConeMaker.
+		inner = self._outer_surface.offset_curve(
+			distance=-self.k, quad_segs=16, join_style=2)
+		self._inner_surface = LineString(np.asarray(inner.coords)[::-1])
 		return None
 	
 	def correct_ends(self):
@@ -348,7 +549,7 @@ class Nosecone:
 			r.append(self._inner_surface)
 		
 		for _coords in r:
-			loc_coords = np.array([(x[0], x[1]) for x in _coords.coords])
+			loc_coords = np.asarray(_coords.coords)[:, :2]
 			loc_coords_copy.append(loc_coords)
 
 		upper_surface = loc_coords_copy[0].T
@@ -419,17 +620,7 @@ class Nosecone:
 			xx = self.coord_pairs[:, 0]
 		if yy is None:
 			yy = self.coord_pairs[:, 1]
-		
-		fig = plt.figure(figsize=(13,6), dpi=150)
-		ax = fig.add_subplot(111)
-		ax.grid()
-		ax.plot(xx, yy, color='g')
-		ax.set_aspect('equal')
-		plt.show()
-		
-		if fn is not None:
-			plt.savefig(fn)
-		return fig
+		return _plot_xy(xx=xx, yy=yy, fn=fn)
 
 	def build_nosecone(self, fn=None):
 		"""Create the spherically blunted nosecone
@@ -442,48 +633,49 @@ class Nosecone:
 				User's Downloads directory.
 			:type fn: Pathlike, str, None
 		"""	
-		self.tangent_ogive()
+		self.nose_profile()
 		if self.shoulder_length > 0:
 			self.add_shoulder()
 		if self.k != 0:
 			self.inner_surface()
-		self.correct_ends()
+		self.join_surfaces()
 		# breakpoint()
 		
 		# if fn is None:
 		# 	fn = 'output_coordinates_file.txt'
-		if fn is not:
-			fn = Path().home().joinpath(f'Downloads/{fn}')
+		if fn is not None:
 			self.write_to_file(fn=fn)
 		return None
 
+	def join_surfaces(self):
+		"""Join the outer and inner surfaces into ``coord_pairs``
+		
+			The last stage of :meth:`build_nosecone`. The stages 
+			:meth:`nose_profile`, :meth:`add_shoulder`, 
+			:meth:`inner_surface` and this one can also be run on their 
+			own, for example to only redo the shoulder and the inner 
+			surface after ``shoulder_radius``, ``shoulder_length`` or 
+			``k`` change.
+		"""
+		self._lod = {}
+		self.correct_ends()
+		self.coord_pairs = self.precision.apply(self.coord_pairs)
+		return None
+
+	@property
+	def precision_error(self):
+		"""The largest coordinate error of the storage precision, mm"""
+		return self.precision.max_error(self.coord_pairs)
+
 	def write_to_file(self, fn):
 		"""Write the nosecone data to a file for OpenSCAD
 		
 			:param fn: The file to write the data to.
 			:type fn: Pathlike, str, None
 		"""
-		filename = Path().home().joinpath(f'Downloads/{fn}')
-		rows, _ = self.coord_pairs.shape
-		i = 0
 		max_length = max(self.coord_pairs.T[0])
-		header = f"""rotate_extrude($fn=200)
-		\trotate([0,0,-90])
-		\t\ttranslate([-{max_length},0,0])
-		\t\t\tpolygon(
-		\t\t\t\tpoints=[
-		"""
-		with open(filename, mode='w', newline='') as fout:
-			fout.write(header)
-			for row in self.coord_pairs:
-				i = i + 1
-				if i == rows:
-					write_str = f'\t\t\t\t\t[{row[0]},' \
-					            f'{row[1]}]\n\t\t\t\t]\n\t\t\t);'
-				else:
-					write_str = f'\t\t\t\t\t[{row[0]},{row[1]}],\n'
-				fout.write(write_str)
-		print(f'File created: "{filename}"')
+		write_scad(self.coord_pairs, fn=output_path(fn), rotate=-90,
+		           translate=-max_length, decimals=self.precision.decimals)
 		return None
 	
 	def to_csv(self, fn=None, base_plane='xy'):
@@ -497,27 +689,339 @@ class Nosecone:
 		"""
 		if fn is None:
 			fn = 'nosecone.txt'
-		fn = Path().home().joinpath(f'Downloads/{fn}')
-		
-		n_rows = self.coord_pairs.shape[0]
-		z_col = np.zeros(self.coord_pairs.shape[0]).reshape(n_rows, 1)
-		y_col = self.coord_pairs[:, 1].reshape(n_rows, 1)
-		x_col = self.coord_pairs[:, 0].reshape(n_rows, 1)
-		xyz = np.zeros(shape=[n_rows, 3])
-		
-		if base_plane.lower() in ['xy', 'yx']:
-			# Output the base of the nosecone in the XY plane. Add all zeros 
-			# for the Z axis.
-			xyz = np.concatenate((x_col, y_col, z_col), axis=1)
-		elif base_plane.lower() in ['xz', 'zx']:
-			# The y-column is the zero column. Swap the Y and Z columns.
-			xyz = np.concatenate((x_col, z_col, y_col), axis=1)
-		elif base_plane.lower() in ['yz', 'zy']:
-			# The x-column is the zero columns. Swap the X and Z columns.
-			xyz = np.concatenate((z_col, y_col, x_col), axis=1)
-		np.savetxt(str(fn), xyz, delimiter=",", fmt='%.4f')
+		write_csv(self.coord_pairs, fn=output_path(fn), base_plane=base_plane)
+		return None
+
+	def export(self, formats, fn=None, base_plane='xy', workers=None,
+	           wait=True):
+		"""Write the nosecone to several formats at the same time
+		
+			Call :meth:`build_nosecone` first. The formats are written 
+			concurrently from one read-only copy of ``self.coord_pairs``.
+		
+			:param formats: The formats to write: 'scad', 'csv', 'binary', 
+				'stl' and/or 'png'.
+			:type formats: list
+			:param fn: The output file name without its extension. 
+				Relative file names are saved to the User's Downloads 
+				directory. Default is 'nosecone'.
+			:type fn: None, Pathlike, str
+			:param base_plane: See :meth:`to_csv`.
+			:type base_plane: str
+			:param workers: The number of threads. Default is one per 
+				format.
+			:type workers: int, None
+			:param wait: See :func:`exporters.export_coords`.
+			:type wait: bool
+			:return: The file (or future) of each format.
+			:rtype: dict
+		"""
+		max_length = max(self.coord_pairs.T[0])
+		writers = {
+			'scad': lambda xy, fn: write_scad(
+				xy, fn, rotate=-90, translate=-max_length,
+				decimals=self.precision.decimals),
+			'csv': lambda xy, fn: write_csv(xy, fn, base_plane=base_plane)}
+		return export_coords(self.coord_pairs, output_path(fn or 'nosecone'),
+		                     formats, writers=writers, workers=workers,
+		                     wait=wait)
+
+	def lod(self, tolerances=(0.01, 0.1, 1.0), budgets=None, segments=200):
+		"""Level-of-detail chain of the built nosecone
+		
+			Call :meth:`build_nosecone` first, ideally with a high ``res``. 
+			The chain is cached until the nosecone is built again.
+		
+			:param tolerances: The largest allowed deviation of each 
+				coarser level, mm.
+			:type tolerances: list, tuple
+			:param budgets: The largest number of points of each coarser 
+				level. Used instead of ``tolerances`` when given.
+			:type budgets: list, tuple, None
+			:param segments: The segments around the axis of the finest 
+				level.
+			:type segments: int
+			:rtype: lod.LODChain
+		"""
+		key = (tuple(tolerances), None if budgets is None else 
+		       tuple(budgets), segments)
+		if key not in self._lod:
+			self._lod[key] = LODChain(self.coord_pairs, tolerances=tolerances,
+			                          budgets=budgets, segments=segments)
+		return self._lod[key]
+
+	def export_lod(self, formats, fn=None, workers=None, skip_invalid=False,
+	               **kwargs):
+		"""Write every level of detail to several formats
+		
+			Level ``i`` is written to ``<fn>_lod<i>.<ext>``. See 
+			:meth:`export` and :meth:`lod`.
+		
+			:param formats: The formats to write.
+			:type formats: list
+			:param fn: The output file name without its extension. 
+				Default is 'nosecone'.
+			:type fn: None, Pathlike, str
+			:param workers: The number of threads.
+			:type workers: int, None
+			:param skip_invalid: Skip the levels whose inner and outer 
+				surfaces cross instead of raising. See 
+				:meth:`lod.LODChain.export`.
+			:type skip_invalid: bool
+			:param kwargs: Passed to :meth:`lod`.
+			:type kwargs: dict
+			:return: The files written for each level, None for a 
+				skipped level.
+			:rtype: list
+		"""
+		max_length = max(self.coord_pairs.T[0])
+		writers = {'scad': lambda xy, fn, segments: write_scad(
+			xy, fn, rotate=-90, translate=-max_length, segments=segments,
+			decimals=self.precision.decimals)}
+		return self.lod(**kwargs).export(output_path(fn or 'nosecone'),
+		                                 formats, writers=writers,
+		                                 workers=workers,
+		                                 skip_invalid=skip_invalid)
+
+
+def section_validity(sections):
+	"""Check which closed cross sections are valid polygons
+	
+		A section is invalid if its outline crosses itself, for example 
+		when the wall is too thick for the part.
+	
+		:param sections: The cross sections with shape (..., n, 2), for 
+			example from :func:`transition_sweep`.
+		:type sections: np.array
+		:return: True for each valid section, with the leading shape of 
+			``sections``.
+		:rtype: np.array
+	"""
+	return shapely.is_valid(shapely.polygons(np.asarray(sections)))
+
+
+def transition_sweep(aft_shoulder_diameter, aft_diameter, fore_diameter,
+                     fore_shoulder_diameter, aft_shoulder_length,
+                     fore_shoulder_length, k, theta=None, taper_length=None,
+                     validate=True):
+	"""Calculate the cross sections of a batch of hollow transitions
+	
+		Every parameter may be a scalar or an array. The parameters are 
+		broadcast together so a sweep over, for example, diameters and 
+		angles is a single array operation. See :class:`Transition` for 
+		the meaning of each parameter. The fore diameter may be larger 
+		than the aft diameter.
+	
+		:param validate: Raise a ValueError if any section is not a valid 
+			polygon. Use False and :func:`section_validity` to filter a 
+			sweep instead.
+		:type validate: bool
+		:return: The closed cross section of each transition with shape 
+			(..., 12, 2). The outer surface runs from the aft shoulder to 
+			the fore shoulder (points 0-5) and the inner surface returns 
+			from the fore shoulder to the aft shoulder (points 6-11).
+		:rtype: np.array
+		:raises: ValueError if neither theta nor taper_length are given, 
+			theta is not between 0 and 90 degrees, the taper length is
+			negative, k is not positive, theta is given for equal aft and
+			fore diameters or a section is invalid.
+	"""
+	# Convert diameters to radii
+	if np.any(np.asarray(k) <= 0):
+		raise ValueError(f'The wall thickness k must be positive, not {k}')
+	r_as, r_a, r_f, r_fs = np.broadcast_arrays(
+		*(np.asarray(d, dtype=float)/2 for d in (
+			aft_shoulder_diameter, aft_diameter, fore_diameter,
+			fore_shoulder_diameter)))
+	
+	if theta is not None:
+		theta = np.asarray(theta, dtype=float)
+		if np.any((theta <= 0) | (theta >= 90)):
+			raise ValueError(f'theta must be between 0 and 90 degrees, not '
+			                 f'{theta}')
+		if np.any(r_a == r_f):
+			raise ValueError('The aft and fore diameters are equal so theta '
+			                 'gives no taper. Use taper_length instead.')
+		# Use theta value to calculate the taper length. Must use the 
+		# diameter values.
+		taper_length = 2*np.abs(r_a - r_f) / np.tan(theta*np.pi/180)
+	elif taper_length is None:
+		raise ValueError('theta or taper_length must be numeric values.')
+	elif np.any(np.asarray(taper_length) < 0):
+		raise ValueError(f'taper_length must not be negative, not '
+		                 f'{taper_length}')
+	
+	x1 = np.asarray(aft_shoulder_length, dtype=float)
+	x2 = x1 + taper_length
+	x3 = x2 + fore_shoulder_length
+	x0, x1, x2, x3, r_as, r_a, r_f, r_fs, k = np.broadcast_arrays(
+		np.zeros_like(x3), x1, x2, x3, r_as, r_a, r_f, r_fs, k)
+	
+	outer = np.empty(x0.shape + (6, 2))
+	outer[..., 0] = np.stack((x0, x1, x1, x2, x2, x3), axis=-1)
+	outer[..., 1] = np.stack((r_as, r_as, r_a, r_f, r_fs, r_fs), axis=-1)
+	inner = _mitre_offset(outer, k)
+	sections = np.concatenate((outer, inner[..., ::-1, :]), axis=-2)
+	if validate:
+		valid = section_validity(sections)
+		if valid.ndim == 0 and not valid:
+			raise ValueError('The transition section crosses itself. Check '
+			                 'the wall thickness k against the diameters and '
+			                 'lengths.')
+		if not np.all(valid):
+			first = tuple(int(i) for i in np.argwhere(~valid)[0])
+			raise ValueError(f'{np.sum(~valid)} of {valid.size} transition '
+			                 f'sections cross themselves, the first at index '
+			                 f'{first}. Use validate=False and '
+			                 f'section_validity() to filter the sweep.')
+	return sections
+
+
+class Transition:
+	"""Transition section plotter object
+	
+		This object will generate a hollow transition section with an aft 
+		shoulder, a tapered section and a fore shoulder. The wall has a 
+		constant thickness ``k``.
+		
+		Unless otherwise noted all measurements are given in millimeters.
+		
+		:param aft_shoulder_diameter: The outer diameter of the aft 
+			shoulder. The same as the inner diameter of the aft airframe.
+		:type aft_shoulder_diameter: int, float
+		:param aft_diameter: The aft airframe outer diameter.
+		:type aft_diameter: int, float
+		:param fore_diameter: The fore airframe outer diameter.
+		:type fore_diameter: int, float
+		:param fore_shoulder_diameter: The outer diameter of the fore 
+			shoulder. The same as the inner diameter of the fore airframe.
+		:type fore_shoulder_diameter: int, float
+		:param aft_shoulder_length: The length of the aft shoulder.
+		:type aft_shoulder_length: int, float
+		:param fore_shoulder_length: The length of the fore shoulder.
+		:type fore_shoulder_length: int, float
+		:param k: Wall thickness
+		:type k: int, float
+		:param theta: The slope angle of the tapered section in degrees. 
+			Use ``None`` to specify ``taper_length`` instead.
+		:type theta: int, float, None
+		:param taper_length: The length of the tapered section. Ignored 
+			unless ``theta`` is None.
+		:type taper_length: int, float, None
+	"""
+	def __init__(self, aft_shoulder_diameter, aft_diameter, fore_diameter,
+	             fore_shoulder_diameter, aft_shoulder_length,
+	             fore_shoulder_length, k, theta=None, taper_length=None):
+		if theta is None and taper_length is None:
+			raise ValueError('theta or taper_length must be numeric values.')
+		self.aft_shoulder_diameter = aft_shoulder_diameter
+		self.aft_diameter = aft_diameter
+		self.fore_diameter = fore_diameter
+		self.fore_shoulder_diameter = fore_shoulder_diameter
+		self.aft_shoulder_length = aft_shoulder_length
+		self.fore_shoulder_length = fore_shoulder_length
+		self.k = k
+		self.theta = theta
+		self.taper_length = taper_length
+		
+		self.coord_pairs = np.array([])
+
+	def __repr__(self):
+		r = (f"Transition(aft_shoulder_diameter={self.aft_shoulder_diameter}"
+		     f", aft_diameter={self.aft_diameter}, fore_diameter="
+		     f"{self.fore_diameter}, fore_shoulder_diameter="
+		     f"{self.fore_shoulder_diameter}, aft_shoulder_length="
+		     f"{self.aft_shoulder_length}, fore_shoulder_length="
+		     f"{self.fore_shoulder_length}, k={self.k}, theta={self.theta}, "
+		     f"taper_length={self.taper_length})")
+		return r
+
+	@property
+	def epsilons(self):
+		"""The lengths of the aft shoulder, tapered section and fore 
+			shoulder
+		"""
+		if self.theta is None:
+			taper_length = self.taper_length
+		else:
+			taper_length = (abs(self.aft_diameter - self.fore_diameter) / 
+			                np.tan(self.theta*np.pi/180))
+		return (self.aft_shoulder_length, taper_length,
+		        self.fore_shoulder_length)
+
+	def build_transition(self, fn=None):
+		"""Create the hollow transition
+		
+			:param fn: The name of the file to write the data to. Relative 
+				file names are saved to the User's Downloads directory. 
+				Nothing is written if None.
+			:type fn: Pathlike, str, None
+		"""
+		self.coord_pairs = transition_sweep(
+			aft_shoulder_diameter=self.aft_shoulder_diameter,
+			aft_diameter=self.aft_diameter,
+			fore_diameter=self.fore_diameter,
+			fore_shoulder_diameter=self.fore_shoulder_diameter,
+			aft_shoulder_length=self.aft_shoulder_length,
+			fore_shoulder_length=self.fore_shoulder_length,
+			k=self.k, theta=self.theta, taper_length=self.taper_length)
+		# Zero-length segments and trimmed corners leave repeated points
+		repeat = np.all(np.diff(self.coord_pairs, axis=0) == 0, axis=1)
+		self.coord_pairs = self.coord_pairs[np.append(~repeat, True)]
+		if fn is not None:
+			self.write_to_file(fn=fn)
 		return None
 
+	def plot_coords(self, fn=None):
+		"""Plot the transition cross section
+		
+			:param fn: The filename to save the plot to.
+			:type fn: None, Pathlike, str
+		"""
+		xx = np.append(self.coord_pairs[:, 0], self.coord_pairs[0, 0])
+		yy = np.append(self.coord_pairs[:, 1], self.coord_pairs[0, 1])
+		return _plot_xy(xx=xx, yy=yy, fn=fn)
+
+	def write_to_file(self, fn):
+		"""Write the transition data to a file for OpenSCAD
+		
+			:param fn: The file to write the data to.
+			:type fn: Pathlike, str
+		"""
+		write_scad(self.coord_pairs, fn=output_path(fn), rotate=90,
+		           translate=0)
+		return None
+
+	def to_csv(self, fn=None, base_plane='xy'):
+		"""Write the data to a .csv file
+		
+			:param fn: The name of the output file to write the data to.
+			:type fn: None, Pathlike, str
+			:param base_plane: The coordinate plane in which the base of the 
+				transition is drawn. Default is 'xy' plane.
+			:type base_plane: str
+		"""
+		if fn is None:
+			fn = 'transition.txt'
+		write_csv(self.coord_pairs, fn=output_path(fn), base_plane=base_plane)
+		return None
+
+	def export(self, formats, fn=None, base_plane='xy', workers=None,
+	           wait=True):
+		"""Write the transition to several formats at the same time
+		
+			Call :meth:`build_transition` first. See 
+			:meth:`Nosecone.export` for the parameters. The default file 
+			name is 'transition'.
+		"""
+		writers = {
+			'scad': lambda xy, fn: write_scad(xy, fn, rotate=90, 
+			                                  translate=0),
+			'csv': lambda xy, fn: write_csv(xy, fn, base_plane=base_plane)}
+		return export_coords(self.coord_pairs,
+		                     output_path(fn or 'transition'), formats,
+		                     writers=writers, workers=workers, wait=wait)
+
 
 if __name__ == "__main__":
 	nc = Nosecone(base_radius=33, tip_radius=10, k=3, shoulder_radius=23,
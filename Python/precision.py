@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+
+"""
+Precision
+
+Storage precision of profile coordinates. Profiles are built in float64
+but machining and printing tolerances are around 0.01 mm, so large
+batches and archives of designs can be stored with much less precision.
+Every policy reports the largest error it can introduce.
+
+
+Policies:
+---------
+float64		Full precision, the default. No error.
+float32		Half the memory of float64 for in-memory batches. The error of
+			each coordinate is at most half a float32 ulp, about 1e-6 mm at
+			100 mm.
+quantized	Coordinates snapped to a grid of ``step`` (default 0.001 mm, one
+			micrometre). The error of each coordinate is at most
+			``step/2``, plus float64 rounding. Text exports only need the
+			decimals of ``step``.
+
+
+Archives:
+---------
+:func:`save_archive` stores many profiles in one compressed .npz file.
+The coordinates are quantized to integer multiples of ``step`` and each
+profile is stored as its first point plus the differences between
+consecutive points, in the smallest integer type that holds them. The
+differences are small and repetitive, so they also compress well. For
+example::
+
+	>>> report = save_archive('designs.npz', {'nc_4to1': nc.coord_pairs})
+	>>> report['ratio'], report['max_error']
+	>>> profiles = load_archive('designs.npz')
+"""
+
+from pathlib import Path
+import numpy as np
+
+
+POLICIES = ('float64', 'float32', 'quantized')
+
+ARCHIVE_VERSION = 1
+
+
+class PrecisionPolicy:
+	"""Storage precision of profile coordinates
+
+		:param name: One of ``POLICIES``.
+		:type name: str
+		:param step: The grid size of the 'quantized' policy, mm.
+		:type step: float
+		:raises: ValueError if the policy is unknown or the step is not
+			positive.
+	"""
+	def __init__(self, name='float64', step=0.001):
+		if name not in POLICIES:
+			raise ValueError(f'Unknown precision policy "{name}". Choose one '
+			                 f'of {list(POLICIES)}')
+		if step <= 0:
+			raise ValueError(f'The quantization step must be positive, not '
+			                 f'{step}')
+		self.name = name
+		self.step = step
+
+	def __repr__(self):
+		if self.name == 'quantized':
+			return f"PrecisionPolicy('{self.name}', step={self.step})"
+		return f"PrecisionPolicy('{self.name}')"
+
+	@property
+	def dtype(self):
+		"""The in-memory dtype of the coordinates"""
+		return np.float32 if self.name == 'float32' else np.float64
+
+	@property
+	def decimals(self):
+		"""Decimals needed by text exports, None for full precision"""
+		if self.name != 'quantized':
+			return None
+		return max(int(np.ceil(-np.log10(self.step) - 1e-9)), 0)
+
+	def apply(self, coord_pairs):
+		"""Return the coordinates stored with this policy
+
+			:param coord_pairs: The n x 2 array of x and y coordinates.
+			:type coord_pairs: np.array
+			:rtype: np.array
+		"""
+		coord_pairs = np.asarray(coord_pairs)
+		if self.name == 'float32':
+			return coord_pairs.astype(np.float32)
+		if self.name == 'quantized':
+			return dequantize(quantize(coord_pairs, self.step), self.step)
+		return coord_pairs.astype(np.float64, copy=False)
+
+	def max_error(self, coord_pairs):
+		"""The guaranteed largest error of any coordinate, mm
+
+			:param coord_pairs: The coordinates, before or after
+				:meth:`apply`.
+			:type coord_pairs: np.array
+			:rtype: float
+		"""
+		if self.name == 'float32':
+			if np.size(coord_pairs) == 0:
+				return 0.0
+			largest = np.float32(np.max(np.abs(coord_pairs)))
+			return float(np.spacing(largest))/2
+		if self.name == 'quantized':
+			return quantized_error(coord_pairs, self.step)
+		return 0.0
+
+
+def precision_policy(policy=None):
+	"""Return a ``PrecisionPolicy`` from a policy or its name
+
+		:param policy: A policy, the name of one or None for 'float64'.
+		:type policy: PrecisionPolicy, str, None
+		:rtype: PrecisionPolicy
+	"""
+	if isinstance(policy, PrecisionPolicy):
+		return policy
+	return PrecisionPolicy(policy or 'float64')
+
+
+def quantize(coord_pairs, step=0.001):
+	"""Round coordinates to integer multiples of ``step``
+
+		:param coord_pairs: The coordinates.
+		:type coord_pairs: np.array
+		:param step: The grid size, mm.
+		:type step: float
+		:return: The coordinates in units of ``step``.
+		:rtype: np.array of int32 or int64
+	"""
+	q = np.rint(np.asarray(coord_pairs, dtype=np.float64)/step)
+	if q.size and np.max(np.abs(q)) < 2**31:
+		return q.astype(np.int32)
+	return q.astype(np.int64)
+
+
+def dequantize(q, step=0.001):
+	"""Convert quantized coordinates back to mm
+
+		:param q: The coordinates in units of ``step``.
+		:type q: np.array
+		:param step: The grid size, mm.
+		:type step: float
+		:rtype: np.array
+	"""
+	return q*step
+
+
+def quantized_error(coord_pairs, step=0.001):
+	"""The guaranteed largest error of quantized coordinates, mm
+
+		Half a step, plus the float64 rounding of converting the grid
+		back to mm.
+
+		:param coord_pairs: The coordinates.
+		:type coord_pairs: np.array
+		:param step: The grid size, mm.
+		:type step: float
+		:rtype: float
+	"""
+	largest = np.max(np.abs(coord_pairs)) if np.size(coord_pairs) else 0.0
+	return step/2 + float(np.spacing(largest + step))
+
+
+def _smallest_int(values):
+	"""The smallest signed integer dtype that holds every value"""
+	if values.size == 0:
+		return np.int8
+	lo, hi = values.min(), values.max()
+	for dtype in (np.int8, np.int16, np.int32):
+		info = np.iinfo(dtype)
+		if info.min <= lo and hi <= info.max:
+			return dtype
+	return np.int64
+
+
+def save_archive(fn, profiles, step=0.001):
+	"""Save many profiles to one quantized, delta encoded .npz archive
+
+		:param fn: The archive file. '.npz' is added if it is missing.
+		:type fn: Pathlike, str
+		:param profiles: The n x 2 coordinates of each profile, keyed by
+			name. A list is keyed by its index. Projectile profiles from
+			``boolit`` are 2 x n, pass ``xy.T``.
+		:type profiles: dict, list
+		:param step: The grid size, mm.
+		:type step: float
+		:return: The number of profiles and points, the float64 size and
+			the archive size in bytes, their ratio and the guaranteed and
+			measured max error in mm.
+		:rtype: dict
+	"""
+	if not isinstance(profiles, dict):
+		profiles = {str(i): xy for i, xy in enumerate(profiles)}
+	names = list(profiles)
+	arrays = [np.asarray(profiles[name], dtype=np.float64).reshape(-1, 2)
+	          for name in names]
+	counts = np.array([len(xy) for xy in arrays], dtype=np.int64)
+	coords = (np.concatenate(arrays) if arrays else np.empty((0, 2)))
+
+	q = quantize(coords, step).astype(np.int64)
+	starts = np.cumsum(counts) - counts
+	starts = starts[counts > 0]
+	first = q[starts]
+	deltas = np.diff(q, axis=0, prepend=np.zeros((1, 2), dtype=np.int64))
+	# Each profile restarts from its own first point
+	deltas[starts] = 0
+	deltas = deltas.astype(_smallest_int(deltas))
+
+	fn = Path(fn)
+	if fn.suffix != '.npz':
+		fn = fn.with_name(f'{fn.name}.npz')
+	fn.parent.mkdir(parents=True, exist_ok=True)
+	np.savez_compressed(fn, version=ARCHIVE_VERSION, step=step,
+	                    names=np.array(names, dtype=str), counts=counts,
+	                    first=first, deltas=deltas)
+
+	err = (float(np.max(np.abs(dequantize(q, step) - coords)))
+	       if coords.size else 0.0)
+	raw = coords.nbytes
+	size = fn.stat().st_size
+	return {'file': fn, 'profiles': len(names), 'points': int(counts.sum()),
+	        'raw_bytes': raw, 'bytes': size, 'ratio': raw/size,
+	        'max_error': quantized_error(coords, step), 'measured_error': err}
+
+
+def load_archive(fn, dtype=np.float64):
+	"""Load the profiles of an archive written by :func:`save_archive`
+
+		:param fn: The archive file.
+		:type fn: Pathlike, str
+		:param dtype: The dtype of the returned coordinates.
+		:type dtype: np.dtype
+		:return: The n x 2 coordinates of each profile, keyed by name. The
+			profiles are views into one array.
+		:rtype: dict
+	"""
+	with np.load(fn) as data:
+		step = float(data['step'])
+		names = data['names'].tolist()
+		counts = data['counts']
+		first = data['first']
+		deltas = data['deltas'].astype(np.int64)
+
+	# One cumulative sum for every profile, then each profile is shifted
+	# back to its own first point
+	q = np.cumsum(deltas, axis=0)
+	starts = np.cumsum(counts) - counts
+	nonempty = counts > 0
+	offsets = first - q[starts[nonempty]]
+	q += np.repeat(offsets, counts[nonempty], axis=0)
+	coords = dequantize(q, step).astype(dtype)
+	return {name: coords[s:s + n] for name, s, n in
+	        zip(names, starts, counts)}
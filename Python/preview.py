@@ -0,0 +1,456 @@
+#!/usr/bin/env python3
+
+"""
+Nosecone Preview
+
+Live preview of ``Nosecone`` parameters. Moving a slider rebuilds only the
+stages of the nosecone that depend on the changed parameter and redraws
+only the lines that changed:
+
+1. profile		The nose shape and tip: ``base_radius``, ``tip_radius``,
+				``ar``, ``shape``, ``alpha`` and ``res``.
+2. outer		The profile plus the shoulder: ``shoulder_radius`` and
+				``shoulder_length``.
+3. inner		The offset interior surface: ``k``.
+
+Each stage is a build method of ``Nosecone``: ``nose_profile``,
+``add_shoulder`` and ``inner_surface``.
+
+For example changing ``k`` reuses the cached outer surface and only the
+inner line is redrawn. Slider changes are debounced so a fast drag builds
+the last position instead of every position in between.
+
+
+Front Ends:
+-----------
+* A localhost web page served with the standard library only::
+
+	python preview.py --res 10000 --port 8000
+
+* A Matplotlib figure with sliders. In JupyterLab use it with the
+  ``%matplotlib widget`` backend (ipympl)::
+
+	python preview.py --res 10000 --matplotlib
+
+	>>> from preview import mpl_preview
+	>>> fig = mpl_preview(res=10000)
+
+The 'Save' button of the web page and :meth:`NoseconePreview.nosecone`
+give a built ``Nosecone`` of the current parameters for export.
+"""
+
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qsl
+import argparse
+import threading
+import inspect
+import base64
+import json
+import time
+import sys
+
+import numpy as np
+
+from nosecone_maker2 import Nosecone
+from nose_shapes import SHAPES
+
+
+DEFAULTS = {'base_radius': 33, 'tip_radius': 10, 'k': 3,
+            'shoulder_radius': 23, 'shoulder_length': 50, 'ar': 4,
+            'res': 10000, 'shape': 'tangent_ogive', 'alpha': None}
+
+# name: (min, max, step)
+SLIDERS = {'base_radius': (5, 100, 0.5),
+           'tip_radius': (0, 50, 0.5),
+           'k': (0.5, 10, 0.1),
+           'shoulder_radius': (4, 100, 0.5),
+           'shoulder_length': (1, 200, 1),
+           'ar': (1, 10, 0.1),
+           'alpha': (0, 1, 0.01)}
+
+PROFILE_PARAMS = ('base_radius', 'tip_radius', 'ar', 'res', 'shape', 'alpha',
+                  'shape_params')
+SHOULDER_PARAMS = ('shoulder_radius', 'shoulder_length')
+
+DEBOUNCE_MS = 30
+
+
+class NoseconePreview:
+	"""Incremental nosecone builder for the preview front ends
+
+		Each build stage is cached with the parameters it depends on, so
+		:meth:`update` only repeats the stages downstream of a change.
+
+		:param kwargs: The ``Nosecone`` parameters, see ``DEFAULTS``.
+		:type kwargs: dict
+	"""
+	def __init__(self, **kwargs):
+		self.params = dict(DEFAULTS, **kwargs)
+		self.lines = {'outer': np.empty((0, 2)), 'inner': np.empty((0, 2))}
+		self.timing = {}
+		self._nc = None
+		self._keys = {}
+		self.update()
+
+	def __repr__(self):
+		return f"NoseconePreview({self.params})"
+
+	def _key(self, names, params):
+		return tuple(repr(params.get(name)) for name in names)
+
+	def update(self, **changes):
+		"""Apply parameter changes and rebuild the stages they affect
+
+			The parameters are only kept if the build succeeds.
+
+			:param changes: The changed ``Nosecone`` parameters.
+			:type changes: dict
+			:return: The lines that changed, 'outer' and/or 'inner', as
+				n x 2 arrays.
+			:rtype: dict
+			:raises: ValueError if the nosecone can't be built with the
+				new parameters.
+		"""
+		params = dict(self.params, **changes)
+		t0 = time.perf_counter()
+		keys = {'profile': self._key(PROFILE_PARAMS, params)}
+		keys['outer'] = (keys['profile'] +
+		                 self._key(SHOULDER_PARAMS, params) +
+		                 (params['k'] == 0,))
+		keys['inner'] = keys['outer'] + (repr(params['k']),)
+
+		nc = self._nc
+		if keys['profile'] != self._keys.get('profile'):
+			options = {name: params[name] for name in
+			           ('res', 'shape', 'alpha', 'shape_params')
+			           if params.get(name) is not None}
+			nc = Nosecone(params['base_radius'], params['tip_radius'],
+			              params['k'], params['shoulder_radius'],
+			              params['shoulder_length'], params['ar'], **options)
+			nc.nose_profile()
+		nc.shoulder_radius = params['shoulder_radius']
+		nc.shoulder_length = params['shoulder_length']
+		nc.k = params['k']
+		t1 = time.perf_counter()
+
+		changed = {}
+		if keys['outer'] != self._keys.get('outer'):
+			nc.add_shoulder()
+			changed['outer'] = nc.outer_coords
+		t2 = time.perf_counter()
+		if keys['inner'] != self._keys.get('inner'):
+			nc.inner_surface()
+			changed['inner'] = nc.inner_coords
+		t3 = time.perf_counter()
+
+		self._nc = nc
+		self._keys = keys
+		self.params = params
+		self.lines.update(changed)
+		self.timing = {'profile_ms': (t1 - t0)*1e3, 'outer_ms': (t2 - t1)*1e3,
+		               'inner_ms': (t3 - t2)*1e3, 'total_ms': (t3 - t0)*1e3}
+		return changed
+
+	def nosecone(self):
+		"""Return the ``Nosecone`` of the current parameters
+
+			The nosecone is built from the cached stages and is ready for
+			:meth:`Nosecone.export` or :meth:`Nosecone.write_to_file`.
+
+			:rtype: Nosecone
+		"""
+		self._nc.join_surfaces()
+		return self._nc
+
+
+def preview_shapes():
+	"""The nose shapes the preview can build
+
+		Shapes with required parameters other than the sliders, such as
+		``L1`` and ``R1`` of the biconic shape, are left out.
+
+		:rtype: list
+	"""
+	names = []
+	for name, cls in sorted(SHAPES.items()):
+		params = inspect.signature(cls).parameters.values()
+		if all(p.default is not p.empty or p.name in ('length', 'base_radius')
+		       for p in params):
+			names.append(name)
+	return names
+
+
+def _parse_value(name, text):
+	"""Convert a query string value to a parameter value"""
+	if name == 'shape':
+		return text
+	if text in ('', 'None', 'null'):
+		return None
+	return int(text) if name == 'res' else float(text)
+
+
+def _lines_json(lines):
+	"""Encode lines as base64 float32 coordinates for the page
+	
+		Much faster to encode and decode than JSON lists of numbers.
+	"""
+	return {name: base64.b64encode(np.ascontiguousarray(
+	        xy, dtype='<f4').tobytes()).decode('ascii')
+	        for name, xy in lines.items()}
+
+
+PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Nosecone Preview</title>
+<style>
+body {font-family: sans-serif; margin: 1em;}
+#controls {display: grid; grid-template-columns: 9em 18em 5em; gap: 4px;}
+svg {width: 100%%; height: 60vh; border: 1px solid #ccc;}
+polyline {fill: none; stroke-width: 1.5; vector-effect: non-scaling-stroke;}
+#outer {stroke: green;} #inner {stroke: teal;}
+#status {font-family: monospace; margin-top: 0.5em;}
+</style></head><body>
+<svg id="view"><g id="flip"><polyline id="outer"/><polyline id="inner"/>
+</g></svg>
+<div id="controls"></div>
+<div>shape <select id="shape"></select>
+<button id="save">Save nosecone.scad</button></div>
+<div id="status"></div>
+<script>
+const SLIDERS = %(sliders)s, SHAPES = %(shapes)s, PARAMS = %(params)s;
+const DEBOUNCE = %(debounce)d;
+let seq = 0, shown = 0, timer = null, pending = {};
+const status = document.getElementById('status');
+
+function draw(lines) {
+	for (const name in lines) {
+		const b = atob(lines[name]), u = new Uint8Array(b.length);
+		for (let i = 0; i < b.length; i++) u[i] = b.charCodeAt(i);
+		const a = new Float32Array(u.buffer), pts = new Array(a.length/2);
+		for (let i = 0; i < pts.length; i++)
+			pts[i] = a[2*i].toFixed(3) + ',' + a[2*i+1].toFixed(3);
+		document.getElementById(name).setAttribute('points', pts.join(' '));
+	}
+	const box = document.getElementById('flip').getBBox(), pad = 5;
+	document.getElementById('view').setAttribute('viewBox',
+		[box.x - pad, -box.y - box.height - pad, box.width + 2*pad,
+		 box.height + 2*pad].join(' '));
+	document.getElementById('flip').setAttribute('transform', 'scale(1,-1)');
+}
+
+async function send(path, changes) {
+	const id = ++seq;
+	const r = await fetch(path + '?' + new URLSearchParams(changes));
+	const data = await r.json();
+	if (id < shown) return;  // A newer reply has been drawn already
+	shown = id;
+	if (data.error) { status.textContent = 'Error: ' + data.error; return; }
+	if (data.lines) draw(data.lines);
+	status.textContent = data.message || ('rebuilt ' +
+		Object.keys(data.lines).join(', ') + ' in ' +
+		data.timing.total_ms.toFixed(1) + ' ms');
+}
+
+function change(name, value) {
+	pending[name] = value;
+	clearTimeout(timer);
+	timer = setTimeout(() => { const c = pending; pending = {};
+	                           send('/update', c); }, DEBOUNCE);
+}
+
+const controls = document.getElementById('controls');
+for (const name in SLIDERS) {
+	const [lo, hi, step] = SLIDERS[name];
+	const value = PARAMS[name] === null ? lo : PARAMS[name];
+	const label = document.createElement('label');
+	const input = document.createElement('input');
+	const out = document.createElement('span');
+	label.textContent = name;
+	Object.assign(input, {type: 'range', min: lo, max: hi, step: step,
+	                      value: value});
+	out.textContent = value;
+	input.addEventListener('input', () => { out.textContent = input.value;
+	                                        change(name, input.value); });
+	controls.append(label, input, out);
+}
+const shape = document.getElementById('shape');
+for (const s of SHAPES) shape.add(new Option(s, s, false, s === PARAMS.shape));
+shape.addEventListener('change', () => change('shape', shape.value));
+document.getElementById('save').addEventListener('click',
+	() => send('/save', {}));
+send('/lines', {});
+</script></body></html>
+"""
+
+
+class PreviewHandler(BaseHTTPRequestHandler):
+	"""Request handler of the preview server
+
+		``GET /`` returns the page, ``/lines`` every line, ``/update?...``
+		applies parameter changes and returns the lines that changed and
+		``/save`` writes ``nosecone.scad`` to the Downloads directory.
+	"""
+	preview = None
+	lock = threading.Lock()
+
+	def log_message(self, format, *args):
+		return None
+
+	def _send(self, body, content_type='application/json'):
+		data = body.encode()
+		self.send_response(200)
+		self.send_header('Content-Type', content_type)
+		self.send_header('Content-Length', str(len(data)))
+		self.end_headers()
+		self.wfile.write(data)
+		return None
+
+	def do_GET(self):
+		url = urlparse(self.path)
+		query = dict(parse_qsl(url.query, keep_blank_values=True))
+		preview = self.preview
+		if url.path == '/':
+			page = PAGE % {'sliders': json.dumps(SLIDERS),
+			               'shapes': json.dumps(preview_shapes()),
+			               'params': json.dumps(preview.params, default=str),
+			               'debounce': DEBOUNCE_MS}
+			return self._send(page, 'text/html')
+
+		reply = {}
+		with self.lock:
+			try:
+				if url.path == '/lines':
+					reply['lines'] = _lines_json(preview.lines)
+				elif url.path == '/update':
+					changes = {name: _parse_value(name, value)
+					           for name, value in query.items()}
+					reply['lines'] = _lines_json(preview.update(**changes))
+				elif url.path == '/save':
+					preview.nosecone().write_to_file('nosecone.scad')
+					reply['message'] = 'Saved nosecone.scad to Downloads'
+				else:
+					self.send_error(404)
+					return None
+			except Exception as e:
+				# Always reply, or the page waits forever
+				reply = {'error': f'{type(e).__name__}: {e}'}
+			reply['timing'] = preview.timing
+		return self._send(json.dumps(reply))
+
+
+def serve(port=8000, open_browser=True, **kwargs):
+	"""Serve the preview page on localhost until interrupted
+
+		:param port: The port to listen on.
+		:type port: int
+		:param open_browser: Open the page in the default web browser.
+		:type open_browser: bool
+		:param kwargs: The initial ``Nosecone`` parameters.
+		:type kwargs: dict
+	"""
+	PreviewHandler.preview = NoseconePreview(**kwargs)
+	server = ThreadingHTTPServer(('127.0.0.1', port), PreviewHandler)
+	url = f'http://127.0.0.1:{server.server_address[1]}/'
+	print(f'Nosecone preview at {url} (Ctrl+C to stop)')
+	if open_browser:
+		import webbrowser
+		webbrowser.open(url)
+	try:
+		server.serve_forever()
+	except KeyboardInterrupt:
+		pass
+	finally:
+		server.server_close()
+	return None
+
+
+def mpl_preview(**kwargs):
+	"""Matplotlib figure with a slider for each parameter
+
+		Slider changes are debounced with a timer of the figure canvas,
+		then only the changed line artists are updated with ``set_data``.
+		Works in JupyterLab with the ``%matplotlib widget`` backend. In a
+		script call ``plt.show()`` afterwards.
+
+		:param kwargs: The initial ``Nosecone`` parameters.
+		:type kwargs: dict
+		:return: The figure. Its ``preview`` attribute is the
+			:class:`NoseconePreview`.
+		:rtype: matplotlib.figure.Figure
+	"""
+	import matplotlib.pyplot as plt
+	from matplotlib.widgets import Slider
+
+	preview = NoseconePreview(**kwargs)
+	fig = plt.figure(figsize=(13, 8))
+	ax = fig.add_axes([0.05, 0.4, 0.9, 0.55])
+	ax.grid()
+	ax.set_aspect('equal')
+	artists = {name: ax.plot(*xy.T, color=color)[0] for (name, xy), color
+	           in zip(preview.lines.items(), ['g', 'c'])}
+
+	pending = {}
+	timer = fig.canvas.new_timer(interval=DEBOUNCE_MS)
+	timer.single_shot = True
+
+	def rebuild():
+		changes = dict(pending)
+		pending.clear()
+		try:
+			changed = preview.update(**changes)
+		except ValueError as e:
+			ax.set_title(f'Error: {e}', color='r')
+			fig.canvas.draw_idle()
+			return None
+		for name, xy in changed.items():
+			artists[name].set_data(xy[:, 0], xy[:, 1])
+		ax.relim()
+		ax.autoscale_view()
+		ax.set_title(f"rebuilt {', '.join(changed) or 'nothing'} in "
+		             f"{preview.timing['total_ms']:.1f} ms", color='k')
+		fig.canvas.draw_idle()
+		return None
+	timer.add_callback(rebuild)
+
+	def on_change(name):
+		def _changed(value):
+			pending[name] = value
+			timer.stop()
+			timer.start()
+			return None
+		return _changed
+
+	fig.sliders = []
+	for i, (name, (lo, hi, step)) in enumerate(SLIDERS.items()):
+		slider_ax = fig.add_axes([0.15, 0.32 - 0.04*i, 0.7, 0.03])
+		value = preview.params[name]
+		slider = Slider(slider_ax, name, lo, hi, valstep=step,
+		                valinit=lo if value is None else value)
+		slider.on_changed(on_change(name))
+		fig.sliders.append(slider)
+	fig.preview = preview
+	return fig
+
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(description='Live nosecone preview.')
+	parser.add_argument('--port', type=int, default=8000)
+	parser.add_argument('--res', type=int, default=DEFAULTS['res'])
+	parser.add_argument('--shape', default=DEFAULTS['shape'])
+	parser.add_argument('--no-browser', action='store_true',
+	                    help='do not open the page in a web browser')
+	parser.add_argument('--matplotlib', action='store_true',
+	                    help='use a Matplotlib window instead of a web page')
+	args = parser.parse_args(argv)
+
+	if args.matplotlib:
+		import matplotlib.pyplot as plt
+		mpl_preview(res=args.res, shape=args.shape)
+		plt.show()
+	else:
+		serve(port=args.port, open_browser=not args.no_browser, res=args.res,
+		      shape=args.shape)
+	return 0
+
+
+if __name__ == "__main__":
+	sys.exit(main())
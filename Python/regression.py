@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+
+"""
+Golden Regression
+
+Compares freshly built geometry against the golden outputs kept in the
+repository, so a rewrite of the makers can't change the geometry without
+anyone noticing. The whole comparison runs in a few seconds.
+
+
+Usage:
+------
+python regression.py [-k NAME] [--list]
+
+The exit status is 1 if any case is out of tolerance.
+
+
+Golden Files:
+-------------
+nosecone		``tests/NoseConeMaker/test_nosecone_1.scad`` and ``.csv``, both
+				OpenSCAD polygons
+transition		``tests/TransitionMaker/test_transition_1.scad`` and ``.csv``
+transition_stl	``tests/TransitionMaker/test_transition_1.stl``, the ASCII STL
+				exported by OpenSCAD
+m855			``BulletPlotter/m855.csv``, quoted "X","Y" columns
+
+
+Metrics:
+--------
+The profiles are compared as polylines, not point by point, so a
+different sampling of the same curve (an extra collinear vertex, a
+different number of points on an offset arc) is not a difference. For
+each point of one profile the distance to the nearest segment of the
+other is found, in chunks of whole array operations:
+
+forward		Largest distance from the golden points to the new profile, mm
+backward	Largest distance from the new points to the golden profile, mm
+hausdorff	The larger of the two, the symmetric Hausdorff distance, mm
+mean		Mean distance from the golden points to the new profile, mm
+pointwise	Largest distance between matching points, mm. Only when both
+			profiles have the same number of points.
+
+A case passes when its Hausdorff distance is within its tolerance.
+:func:`compare` can be used on its own to check any two profiles.
+"""
+
+from pathlib import Path
+import argparse
+import time
+import sys
+import re
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'BulletPlotter'))
+
+from nosecone_maker2 import Nosecone, Transition
+from exporters import STL_RECORD, revolve_mesh
+from lod import segment_distance
+import boolit
+
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# Pairs of numbers in square brackets, e.g. "[0.1,0.024992]"
+_PAIR = re.compile(r'\[\s*([-+.\deE]+)\s*,\s*([-+.\deE]+)\s*\]')
+_VERTEX = re.compile(r'vertex\s+(\S+)\s+(\S+)\s+(\S+)')
+
+# Largest number of point-segment pairs evaluated at once
+CHUNK = 1_000_000
+
+
+def read_scad_points(fn):
+	"""Read the points of an OpenSCAD ``polygon(points=[...])``
+
+		The nosecone and transition golden .csv files are written in the
+		same format as the .scad files.
+
+		:param fn: The file.
+		:type fn: Pathlike, str
+		:return: The n x 2 array of points.
+		:rtype: np.array
+	"""
+	text = Path(fn).read_text()
+	points = text[text.index('points'):]
+	return np.array(_PAIR.findall(points), dtype=float).reshape(-1, 2)
+
+
+def read_csv_points(fn):
+	"""Read a csv file of quoted x and y columns with a header row
+
+		:param fn: The file.
+		:type fn: Pathlike, str
+		:return: The n x 2 array of points.
+		:rtype: np.array
+	"""
+	text = Path(fn).read_text().replace('"', '')
+	rows = text.splitlines()[1:]
+	return np.array([row.split(',') for row in rows if row],
+	                dtype=float).reshape(-1, 2)
+
+
+def read_stl(fn):
+	"""Read the triangles of an ASCII or binary STL file
+
+		:param fn: The file.
+		:type fn: Pathlike, str
+		:return: The m x 3 x 3 array of triangle vertices.
+		:rtype: np.array
+	"""
+	data = Path(fn).read_bytes()
+	n = int(np.frombuffer(data[80:84], dtype='<u4')[0]) if len(data) >= 84 else -1
+	if len(data) == 84 + n*STL_RECORD.itemsize:
+		records = np.frombuffer(data, dtype=STL_RECORD, count=n, offset=84)
+		return records['vertices'].astype(float)
+	vertices = _VERTEX.findall(data.decode('ascii', errors='replace'))
+	return np.array(vertices, dtype=float).reshape(-1, 3, 3)
+
+
+def point_to_polyline(points, polyline, closed=False):
+	"""Distance from every point to the nearest segment of a polyline
+
+		:param points: The n x d points.
+		:type points: np.array
+		:param polyline: The m x d polyline vertices.
+		:type polyline: np.array
+		:param closed: If True the last vertex connects to the first.
+		:type closed: bool
+		:return: The n distances.
+		:rtype: np.array
+	"""
+	points = np.asarray(points, dtype=float)
+	polyline = np.asarray(polyline, dtype=float)
+	if closed:
+		polyline = np.concatenate((polyline, polyline[:1]))
+	if len(polyline) == 1:
+		return np.linalg.norm(points - polyline[0], axis=-1)
+	a = polyline[:-1]
+	b = polyline[1:]
+	d = np.empty(len(points))
+	step = max(CHUNK // len(a), 1)
+	for i in range(0, len(points), step):
+		p = points[i:i + step, np.newaxis, :]
+		d[i:i + step] = segment_distance(p, a, b).min(axis=1)
+	return d
+
+
+def _point_to_points(points, other):
+	"""Distance from every point to the nearest point of ``other``"""
+	d = np.empty(len(points))
+	step = max(CHUNK // len(other), 1)
+	for i in range(0, len(points), step):
+		diff = points[i:i + step, np.newaxis, :] - other[np.newaxis]
+		d[i:i + step] = np.sqrt(np.min(np.sum(diff*diff, axis=-1), axis=1))
+	return d
+
+
+def compare(golden, new, closed=True, polyline=True):
+	"""Compare a new profile with a golden one
+
+		:param golden: The n x d golden points.
+		:type golden: np.array
+		:param new: The m x d new points.
+		:type new: np.array
+		:param closed: The profiles are closed polygons.
+		:type closed: bool
+		:param polyline: Measure to the segments of the other profile. If
+			False measure to its points, for point clouds such as the
+			vertices of a mesh.
+		:type polyline: bool
+		:return: The metrics, see the module docstring.
+		:rtype: dict
+	"""
+	golden = np.asarray(golden, dtype=float)
+	new = np.asarray(new, dtype=float)
+	if polyline:
+		forward = point_to_polyline(golden, new, closed=closed)
+		backward = point_to_polyline(new, golden, closed=closed)
+	else:
+		forward = _point_to_points(golden, new)
+		backward = _point_to_points(new, golden)
+	metrics = {'points': (len(golden), len(new)),
+	           'forward': float(forward.max()),
+	           'backward': float(backward.max()),
+	           'mean': float(forward.mean())}
+	metrics['hausdorff'] = max(metrics['forward'], metrics['backward'])
+	if golden.shape == new.shape:
+		metrics['pointwise'] = float(np.linalg.norm(golden - new,
+		                                            axis=-1).max())
+	return metrics
+
+
+def _golden_nosecone():
+	"""The nosecone of ``tests/NoseConeMaker``"""
+	nc = Nosecone(base_radius=20, tip_radius=0, k=1.5, shoulder_radius=18,
+	              shoulder_length=38, ar=4, res=1600, shape='parabolic',
+	              alpha=1)
+	nc.build_nosecone()
+	return nc.coord_pairs
+
+
+def _golden_transition():
+	"""The transition of ``tests/TransitionMaker``"""
+	tr = Transition(aft_shoulder_diameter=38, aft_diameter=40,
+	                fore_diameter=24, fore_shoulder_diameter=22,
+	                aft_shoulder_length=40, fore_shoulder_length=24, k=1,
+	                theta=30)
+	tr.build_transition()
+	return tr.coord_pairs
+
+
+def _stl_profile(tris):
+	"""The (axial, radius) points of the vertices of a revolved mesh"""
+	v = np.unique(tris.reshape(-1, 3), axis=0)
+	return np.column_stack((v[:, 2], np.hypot(v[:, 0], v[:, 1])))
+
+
+def _golden_m855():
+	"""The projectile of ``BulletPlotter/m855.csv``"""
+	R = {'tip': 0.13/2, 'basic': 1/2, 'cannelure': 0.9/2,
+	     'boat_tail': 0.8/2, 'heel': 0.13}
+	L = {'boat_tail': 0.49, 'basic': 1.2, 'cannelure': 0.2, 'ogive': 2.17}
+	R, L = boolit.caliber_dicts(R, L, 5.69)
+	xy, _, _ = boolit.tangent_ogive(R_DICT=R, L_DICT=L, res=1000)
+	return xy.T
+
+
+# name: (golden file, reader, builder, options of compare, tolerance in mm)
+CASES = {
+	'nosecone_scad': ('tests/NoseConeMaker/test_nosecone_1.scad',
+	                  read_scad_points, _golden_nosecone, {}, 1e-6),
+	'nosecone_csv': ('tests/NoseConeMaker/test_nosecone_1.csv',
+	                 read_scad_points, _golden_nosecone, {}, 1e-6),
+	'transition_scad': ('tests/TransitionMaker/test_transition_1.scad',
+	                    read_scad_points, _golden_transition, {}, 1e-9),
+	'transition_csv': ('tests/TransitionMaker/test_transition_1.csv',
+	                   read_scad_points, _golden_transition, {}, 1e-9),
+	# The STL vertices are printed to 6 significant digits. The profile is
+	# compared in (axial, radius) and the vertices against the mesh
+	# revolved from the new profile.
+	'transition_stl_profile': (
+		'tests/TransitionMaker/test_transition_1.stl',
+		lambda fn: _stl_profile(read_stl(fn)), _golden_transition,
+		{'closed': True}, 1e-3),
+	'transition_stl_vertices': (
+		'tests/TransitionMaker/test_transition_1.stl',
+		lambda fn: np.unique(read_stl(fn).reshape(-1, 3), axis=0),
+		lambda: np.unique(revolve_mesh(_golden_transition(), 200).reshape(
+			-1, 3), axis=0),
+		{'polyline': False}, 1e-3),
+	'm855': ('BulletPlotter/m855.csv', read_csv_points, _golden_m855,
+	         {'closed': False}, 1e-9),
+}
+
+
+def run_case(name):
+	"""Build one case and compare it with its golden file
+
+		:param name: The name of the case, see ``CASES``.
+		:type name: str
+		:return: The metrics plus the tolerance, whether it passed and the
+			time taken.
+		:rtype: dict
+	"""
+	fn, read, build, options, tolerance = CASES[name]
+	t0 = time.perf_counter()
+	golden = read(ROOT / fn)
+	new = build()
+	result = compare(golden, new, **options)
+	result.update({'name': name, 'file': fn, 'tolerance': tolerance,
+	               'passed': result['hausdorff'] <= tolerance,
+	               'seconds': time.perf_counter() - t0})
+	return result
+
+
+def run(names=None):
+	"""Run several cases
+
+		:param names: The cases to run. Default is every case.
+		:type names: list, None
+		:rtype: list
+	"""
+	return [run_case(name) for name in (names or CASES)]
+
+
+def print_results(results):
+	"""Print a table of the results"""
+	print(f"{'case':<24}{'points':>13}{'hausdorff':>12}{'pointwise':>12}"
+	      f"{'tolerance':>11}{'time':>8}")
+	for r in results:
+		points = '{}/{}'.format(*r['points'])
+		pointwise = (f"{r['pointwise']:.2e}" if 'pointwise' in r else '-')
+		status = 'ok' if r['passed'] else 'FAIL'
+		print(f"{r['name']:<24}{points:>13}{r['hausdorff']:>12.2e}"
+		      f"{pointwise:>12}{r['tolerance']:>11.0e}"
+		      f"{r['seconds']:>7.2f}s  {status}")
+	n_failed = sum(not r['passed'] for r in results)
+	print(f"{len(results) - n_failed} passed, {n_failed} failed in "
+	      f"{sum(r['seconds'] for r in results):.2f} s")
+	return None
+
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(
+		description='Compare freshly built geometry with the golden files.')
+	parser.add_argument('-k', dest='pattern', default=None,
+	                    help='only run the cases whose name contains this')
+	parser.add_argument('--list', action='store_true',
+	                    help='list the cases and their golden files')
+	args = parser.parse_args(argv)
+
+	names = [name for name in CASES
+	         if args.pattern is None or args.pattern in name]
+	if args.list:
+		for name in names:
+			print(f'{name:<24}{CASES[name][0]}')
+		return 0
+	if not names:
+		print(f'No case matches "{args.pattern}"')
+		return 1
+	results = run(names)
+	print_results(results)
+	return 1 if any(not r['passed'] for r in results) else 0
+
+
+if __name__ == "__main__":
+	sys.exit(main())